@@ -8,3 +8,14 @@ from signal import signal, SIGINT
 from typing import Any, Callable, Coroutine, Final, List, Optional, Tuple
 from urllib.parse import unquote
 
+
+from bot import bot_loop
+from bot.helper.listeners.aria2_listener import start_aria2_listener
+
+
+async def main():
+    start_aria2_listener()
+
+
+bot_loop.run_until_complete(main())
+bot_loop.run_forever()
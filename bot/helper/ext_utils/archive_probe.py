@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+from os import stat
+from typing import NamedTuple
+
+from bot import LOGGER
+from bot.helper.ext_utils.bot_utils import cmd_exec
+from bot.helper.ext_utils.fs_utils import parse_slt_listing, extracted_size
+
+PROBE_CACHE_LIMIT = 1000
+
+
+class ArchiveProbe(NamedTuple):
+    valid: bool
+    encrypted: bool
+    members: int
+    unpacked: int
+    volumes: tuple
+    entries: tuple
+
+    def size(self, exts=()):
+        """Bytes the extraction writes when members with ``exts`` are skipped."""
+        return extracted_size(self.entries, exts)
+
+
+# (first volume, size, mtime_ns, password) -> ArchiveProbe
+_probe_cache = {}
+
+
+async def probe_archive(path, pswd='', volumes=()):
+    """
+    Header listing of the archive (set) starting at ``path``, cached per file version and password.
+
+    ``7z l -slt`` only reads headers, so this is cheap compared to the extraction.
+    An archive with encrypted headers can't be listed without the right password
+    and comes back as encrypted but not valid, anything else 7z can't open as not
+    valid. ``volumes`` are the ``(path, size)`` pairs of every volume of the set.
+    """
+    try:
+        st = stat(path)
+    except OSError:
+        return ArchiveProbe(False, False, 0, 0, tuple(volumes), ())
+    key = (path, st.st_size, st.st_mtime_ns, pswd)
+    if (probe := _probe_cache.get(key)) is not None:
+        return probe
+    stdout, stderr, code = await cmd_exec(['7z', 'l', '-slt', f'-p{pswd}', path])
+    if code == 0:
+        entries = tuple(parse_slt_listing(stdout))
+        files = [entry for entry in entries if not entry[2]]
+        probe = ArchiveProbe(True, any(entry[3] for entry in entries), len(files),
+                             sum(entry[1] for entry in files), tuple(volumes), entries)
+    else:
+        encrypted = 'encrypted' in stderr.lower() or 'wrong password' in stderr.lower()
+        if not encrypted:
+            LOGGER.info(f'Not a valid archive: {path}')
+        probe = ArchiveProbe(False, encrypted, 0, 0, tuple(volumes), ())
+    if len(_probe_cache) >= PROBE_CACHE_LIMIT:
+        _probe_cache.clear()
+    _probe_cache[key] = probe
+    return probe
+
+
+def forget_probes(paths):
+    """Drop the cached probes of ``paths``, e.g. once their volumes were extracted and deleted."""
+    paths = set(paths)
+    for key in [key for key in _probe_cache if key[0] in paths]:
+        del _probe_cache[key]
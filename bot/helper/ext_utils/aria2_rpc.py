@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+from asyncio import Lock, sleep, wait_for
+from base64 import b64encode
+from itertools import count
+from json import dumps, loads
+
+from aiohttp import ClientSession, WSMsgType
+from aiofiles import open as aiopen
+
+from bot import LOGGER, aria2, bot_loop
+
+RPC_TIMEOUT = 30
+RECONNECT_DELAY = 3
+
+
+class Aria2RpcError(Exception):
+    pass
+
+
+class Aria2WebSocket:
+    """
+    One long-lived JSON-RPC connection to aria2 over its WebSocket endpoint.
+
+    The same socket carries method calls (adds, pauses, status queries) and the
+    server-pushed ``aria2.on*`` notifications, so completion is handled as soon as
+    aria2 reports it and no connection is opened per download. The address and
+    ``token:`` secret are the ones of the aria2 client.
+    """
+
+    def __init__(self, url, secret=''):
+        self.__url = url
+        self.__secret = secret
+        self.__ids = count(1)
+        self.__pending = {}
+        self.__handlers = {}
+        self.__handler_tasks = set()  # Strong references, the loop only keeps weak ones
+        self.__session = None
+        self.__ws = None
+        self.__task = None
+        self.__connect_lock = Lock()
+
+    def on(self, event, handler):
+        self.__handlers[event] = handler
+
+    async def __connect(self):
+        async with self.__connect_lock:
+            if self.__ws is not None and not self.__ws.closed:
+                return self.__ws
+            if self.__session is None or self.__session.closed:
+                self.__session = ClientSession()
+            self.__ws = await self.__session.ws_connect(self.__url, heartbeat=30, max_msg_size=0)
+            LOGGER.info('Aria2 WebSocket connected')
+            return self.__ws
+
+    async def __reader(self):
+        while True:
+            try:
+                ws = await self.__connect()
+                async for msg in ws:
+                    if msg.type == WSMsgType.TEXT:
+                        self.__dispatch(loads(msg.data))
+                    elif msg.type in (WSMsgType.CLOSED, WSMsgType.ERROR):
+                        break
+            except Exception as e:
+                LOGGER.error(f'Aria2 WebSocket: {e}')
+            for future in self.__pending.values():
+                if not future.done():
+                    future.set_exception(Aria2RpcError('Aria2 WebSocket disconnected'))
+            self.__pending.clear()
+            await sleep(RECONNECT_DELAY)
+
+    def __dispatch(self, data):
+        for item in data if isinstance(data, list) else [data]:
+            if 'method' in item:
+                handler = self.__handlers.get(item['method'])
+                if handler is None:
+                    continue
+                for event in item.get('params', []):
+                    task = bot_loop.create_task(handler(event['gid']))
+                    self.__handler_tasks.add(task)
+                    task.add_done_callback(self.__handler_tasks.discard)
+            elif (future := self.__pending.pop(item.get('id'), None)) is not None and not future.done():
+                if 'error' in item:
+                    future.set_exception(Aria2RpcError(item['error'].get('message', 'Unknown error')))
+                else:
+                    future.set_result(item.get('result'))
+
+    def start(self):
+        if self.__task is None or self.__task.done():
+            self.__task = bot_loop.create_task(self.__reader())
+
+    async def call(self, method, *params):
+        ws = await self.__connect()
+        self.start()
+        msg_id = next(self.__ids)
+        if self.__secret:
+            params = (f'token:{self.__secret}', *params)
+        future = bot_loop.create_future()
+        self.__pending[msg_id] = future
+        try:
+            await ws.send_str(dumps({'jsonrpc': '2.0', 'id': msg_id, 'method': method, 'params': list(params)}))
+            return await wait_for(future, RPC_TIMEOUT)
+        finally:
+            self.__pending.pop(msg_id, None)
+
+    async def add_download(self, link, options):
+        if link.startswith(('magnet:', 'http://', 'https://', 'ftp://')):
+            return await self.call('aria2.addUri', [link], options)
+        async with aiopen(link, 'rb') as f:
+            torrent = b64encode(await f.read()).decode()
+        return await self.call('aria2.addTorrent', torrent, [], options)
+
+    async def tell_status(self, gid):
+        return await self.call('aria2.tellStatus', gid)
+
+    async def force_pause(self, gid):
+        return await self.call('aria2.forcePause', gid)
+
+    async def unpause(self, gid):
+        return await self.call('aria2.unpause', gid)
+
+    async def remove(self, gid):
+        return await self.call('aria2.forceRemove', gid)
+
+    async def close(self):
+        if self.__task is not None:
+            self.__task.cancel()
+        if self.__ws is not None:
+            await self.__ws.close()
+        if self.__session is not None:
+            await self.__session.close()
+
+
+aria2_ws = Aria2WebSocket(aria2.client.ws_server, aria2.client.secret)
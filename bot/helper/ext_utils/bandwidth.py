@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+from asyncio import Lock, gather, run_coroutine_threadsafe, sleep
+from time import monotonic
+
+from bot import LOGGER, aria2, aria2_options, bot_loop, config_dict, get_client, qbit_options
+from bot.helper.ext_utils.bot_utils import sync_to_async
+
+# Engines whose uploads are paced by the limiter, clients that pace themselves get their share as an option
+ENGINES = ('ddl', 'tg', 'gd', 'rclone', 'aria2', 'qbit')
+# Engines that pace themselves outside this process, each is given a fixed share of SPEED_LIMIT
+CLIENT_ENGINES = ('aria2', 'qbit', 'rclone')
+# A user stops counting towards the fair split after this many seconds without sending
+ACTIVE_WINDOW = 10
+
+
+class TokenBucket:
+    """
+    Bytes-per-second bucket holding at most one second of tokens.
+
+    ``consume`` waits until enough tokens have accumulated. The lock makes
+    waiters take their turn in order, so a large chunk can't be starved by a
+    stream of small ones.
+    """
+
+    def __init__(self, rate=0):
+        self.rate = rate
+        self.__tokens = rate
+        self.__updated = monotonic()
+        self.__lock = Lock()
+
+    def __refill(self):
+        now = monotonic()
+        self.__tokens = min(self.rate, self.__tokens + (now - self.__updated) * self.rate)
+        self.__updated = now
+
+    async def consume(self, amount):
+        if not self.rate:
+            return
+        async with self.__lock:
+            self.__refill()
+            self.__tokens -= amount
+            # Going into debt lets chunks larger than the bucket through, paid back by waiting
+            if self.__tokens < 0:
+                await sleep(-self.__tokens / self.rate)
+                self.__refill()
+
+
+def _mb(value):
+    return int(float(value) * 1024 * 1024) if value else 0
+
+
+class BandwidthLimiter:
+    """
+    Upload budget shared by every uploader.
+
+    SPEED_LIMIT caps the total egress in MB/s. aria2, qBittorrent and rclone pace
+    themselves, so each gets a fixed share of it (``client_caps``) and the
+    in-process uploaders share the rest. The split is static: a share is kept
+    for its engine even while that engine sends nothing. That rest is split evenly between the
+    users that sent data in the last ``ACTIVE_WINDOW`` seconds, USER_SPEED_LIMIT
+    caps any single user, and ENGINE_SPEED_LIMIT (``tg:20 ddl:10``) caps
+    engines. A chunk waits for tokens from the global, engine and user buckets
+    at the same time, so it is held back by the tightest one. Unset limits are free.
+    """
+
+    def __init__(self):
+        self.__global = TokenBucket()
+        self.__engines = {engine: TokenBucket() for engine in ENGINES}
+        self.__users = {}
+        self.__active = {}
+        self.__engine_setting = ''
+        self.__engine_limits = {}
+        self.__client_limits = set()  # Client engines this process put an upload limit on
+
+    def engine_limits(self):
+        """ENGINE_SPEED_LIMIT in bytes per second by engine, parsed again only when the setting changes."""
+        value = config_dict.get('ENGINE_SPEED_LIMIT') or ''
+        if value != self.__engine_setting:
+            self.__engine_setting, self.__engine_limits = value, {}
+            for item in value.split():
+                engine, _, limit = item.partition(':')
+                try:
+                    self.__engine_limits[engine.strip().lower()] = _mb(limit)
+                except ValueError:
+                    LOGGER.error(f'Invalid ENGINE_SPEED_LIMIT entry: {item}')
+        return self.__engine_limits
+
+    def client_caps(self):
+        """
+        Bytes per second each of CLIENT_ENGINES may send.
+
+        With SPEED_LIMIT set, every client engine and the in-process uploaders get
+        an equal share. An ENGINE_SPEED_LIMIT replaces an engine's share, and the
+        caps are scaled down so the in-process uploaders keep at least one share.
+        """
+        total, limits = _mb(config_dict.get('SPEED_LIMIT')), self.engine_limits()
+        if not total:
+            return {engine: limits.get(engine, 0) for engine in CLIENT_ENGINES}
+        share = total // (len(CLIENT_ENGINES) + 1)
+        caps = {engine: min(limits.get(engine) or share, total) for engine in CLIENT_ENGINES}
+        if (used := sum(caps.values())) > total - share:
+            caps = {engine: max(cap * (total - share) // used, 1) for engine, cap in caps.items()}
+        return caps
+
+    def in_process_rate(self):
+        """What is left of SPEED_LIMIT for the uploaders paced here, 0 for unlimited."""
+        total = _mb(config_dict.get('SPEED_LIMIT'))
+        return total - sum(self.client_caps().values()) if total else 0
+
+    def limited(self, engine):
+        """Whether any limit applies to ``engine``, so unlimited uploads can skip the buckets."""
+        return bool(config_dict.get('SPEED_LIMIT') or config_dict.get('USER_SPEED_LIMIT') or self.engine_limits().get(engine))
+
+    def user_rate(self, user_id=None):
+        """Bytes per second ``user_id`` may send now through the in-process uploaders, 0 for unlimited."""
+        now = monotonic()
+        active = sum(1 for last in self.__active.values() if now - last < ACTIVE_WINDOW)
+        if user_id is not None and now - self.__active.get(user_id, 0) >= ACTIVE_WINDOW:
+            active += 1
+        total = self.in_process_rate()
+        rates = [rate for rate in (total // max(active, 1), _mb(config_dict.get('USER_SPEED_LIMIT'))) if rate]
+        return min(rates) if rates else 0
+
+    async def consume(self, user_id, engine, amount):
+        """Wait until ``user_id`` may send ``amount`` more bytes through ``engine``."""
+        if not self.limited(engine):
+            return
+        self.__active[user_id] = monotonic()
+        self.__global.rate = self.in_process_rate()
+        engine_bucket = self.__engines.setdefault(engine, TokenBucket())
+        engine_bucket.rate = self.engine_limits().get(engine, 0)
+        if (user_bucket := self.__users.get(user_id)) is None:
+            user_bucket = self.__users[user_id] = TokenBucket()
+        user_bucket.rate = self.user_rate(user_id)
+        await gather(*(bucket.consume(amount) for bucket in (self.__global, engine_bucket, user_bucket)))
+
+    def consume_sync(self, user_id, engine, amount):
+        """``consume`` for uploaders running in a worker thread, free of the loop round trip when nothing is limited."""
+        if self.limited(engine):
+            run_coroutine_threadsafe(self.consume(user_id, engine, amount), bot_loop).result()
+
+    def rclone_flags(self, user_id=None):
+        """``--bwlimit`` for an rclone upload of ``user_id``, rclone paces itself within its share."""
+        rates = [rate for rate in (self.client_caps()['rclone'], _mb(config_dict.get('USER_SPEED_LIMIT'))) if rate]
+        return ['--bwlimit', f'{max(min(rates) // 1024, 1)}K'] if rates else []
+
+    async def apply_client_limits(self):
+        """
+        Push the aria2 and qBittorrent shares of the budget as their global upload limits.
+
+        Engines without a share are left alone, so limits set in the aria2 and
+        qBittorrent options stay in place. Once a share is dropped, the limit of
+        those options is restored.
+        """
+        caps = self.client_caps()
+        setters = {'aria2': lambda rate: aria2.set_global_options({'max-overall-upload-limit': str(rate)}),
+                   'qbit': lambda rate: get_client().app_set_preferences({'up_limit': rate})}
+        defaults = {'aria2': aria2_options.get('max-overall-upload-limit', '0'), 'qbit': qbit_options.get('up_limit', 0)}
+        for engine, setter in setters.items():
+            if not caps[engine] and engine not in self.__client_limits:
+                continue
+            try:
+                await sync_to_async(setter, caps[engine] or defaults[engine])
+            except Exception as e:
+                LOGGER.error(f'Unable to set {engine} upload limit: {e}')
+                continue
+            if caps[engine]:
+                self.__client_limits.add(engine)
+            else:
+                self.__client_limits.discard(engine)
+
+
+bandwidth_limiter = BandwidthLimiter()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+from asyncio import Event
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from os import cpu_count
+from time import time
+
+from bot import LOGGER, config_dict, download_dict, download_dict_lock
+
+
+class CpuSlotCancelled(Exception):
+    """The task was cancelled while its stage waited, the stage must not run."""
+
+
+class CpuStageExecutor:
+    """
+    Global gate for CPU-heavy subprocesses (7z, ffmpeg, split).
+
+    At most ``QUEUE_CPU`` stages run at once, ``os.cpu_count()`` when unset. Waiters
+    are queued per user and the next free slot goes to the queued user with the
+    fewest running stages, so one user's batch cannot starve everyone else.
+    """
+
+    def __init__(self):
+        self.__running = {}
+        self.__queues = OrderedDict()
+        self.__waiters = {}
+
+    @staticmethod
+    def __limit():
+        return config_dict.get('QUEUE_CPU') or cpu_count() or 1
+
+    def dispatch(self):
+        while self.__queues and len(self.__running) < self.__limit():
+            running = {}
+            for user_id in self.__running.values():
+                running[user_id] = running.get(user_id, 0) + 1
+            user_id = min(self.__queues, key=lambda user: running.get(user, 0))
+            queue = self.__queues[user_id]
+            token = queue.popleft()
+            if queue:
+                self.__queues.move_to_end(user_id)
+            else:
+                del self.__queues[user_id]
+            self.__running[token] = user_id
+            self.__waiters.pop(token)[0].set()
+
+    def __dequeue(self, token):
+        if (waiter := self.__waiters.pop(token, None)) is None:
+            return
+        user_id = waiter[1]
+        if (queue := self.__queues.get(user_id)) is not None:
+            queue.remove(token)
+            if not queue:
+                del self.__queues[user_id]
+        waiter[0].set()
+
+    def cancel(self, uid):
+        """Wake every stage of a task cancelled while waiting, without giving them a slot."""
+        for token, waiter in list(self.__waiters.items()):
+            if waiter[3] == uid:
+                self.__dequeue(token)
+
+    def waiting_since(self, uid):
+        return min((waiter[2] for waiter in self.__waiters.values() if waiter[3] == uid), default=None)
+
+    def stats(self):
+        return len(self.__running), len(self.__waiters), self.__limit()
+
+    @asynccontextmanager
+    async def slot(self, listener, status=None):
+        uid = listener.uid
+        user_id = listener.message.from_user.id
+        # One token per stage, a task may run several stages at once
+        token = object()
+        event = Event()
+        self.__waiters[token] = (event, user_id, time(), uid)
+        self.__queues.setdefault(user_id, deque()).append(token)
+        self.dispatch()
+        if not event.is_set():
+            if status is not None:
+                from bot.helper.mirror_utils.status_utils.cpu_wait_status import CpuWaitStatus
+                async with download_dict_lock:
+                    if uid in download_dict:
+                        download_dict[uid] = CpuWaitStatus(status, self)
+            start = time()
+            try:
+                await event.wait()
+            except BaseException:
+                self.__dequeue(token)
+                raise
+            if token not in self.__running:
+                # Woken by cancel(), no slot was given
+                raise CpuSlotCancelled
+            LOGGER.info(f'Waited {time() - start:.1f}s for a CPU slot: {uid}')
+            if status is not None:
+                async with download_dict_lock:
+                    if uid in download_dict:
+                        download_dict[uid] = status
+        try:
+            yield
+        finally:
+            if self.__running.pop(token, None) is not None:
+                self.dispatch()
+
+
+cpu_executor = CpuStageExecutor()
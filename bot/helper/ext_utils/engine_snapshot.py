@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+from time import time
+from threading import Lock
+from types import MappingProxyType
+
+from aria2p import Client as ariaClient, Download
+
+from bot import aria2, LOGGER
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.qbit_state import qbit_state
+
+SNAPSHOT_TTL = 1
+ARIA2_PAGE = 1000
+
+
+class EngineSnapshot:
+    """
+    Per-tick, read-only view of every download engine.
+
+    Each engine is queried with one bulk call per tick (aria2 ``system.multicall`` of
+    ``tellActive``/``tellWaiting``/``tellStopped`` and one qBittorrent ``sync/maindata``
+    delta) instead of one RPC round trip per status object. Readers never take the
+    lock and never refresh: the status tick awaits ``refresh()`` in a thread, which
+    builds new tables and swaps them in as read-only mappings.
+    """
+
+    def __init__(self, ttl=SNAPSHOT_TTL):
+        self.__ttl = ttl
+        self.__aria2_lock = Lock()
+        self.__qbit_lock = Lock()
+        self.__aria2_time = 0
+        self.__qbit_time = 0
+        self.__downloads = MappingProxyType({})
+        self.__aria2_taken = 0  # When the aria2 table was last built, invalidate() leaves it alone
+
+    def __aria2_stale(self):
+        return time() - self.__aria2_time >= self.__ttl
+
+    def __qbit_stale(self):
+        return time() - self.__qbit_time >= self.__ttl
+
+    def refresh_aria2(self, force=False):
+        if not force and not self.__aria2_stale():
+            return
+        with self.__aria2_lock:
+            if not force and not self.__aria2_stale():
+                return
+            methods = [(ariaClient.TELL_ACTIVE,),
+                       (ariaClient.TELL_WAITING, 0, ARIA2_PAGE),
+                       (ariaClient.TELL_STOPPED, 0, ARIA2_PAGE)]
+            try:
+                results = aria2.client.multicall(methods)
+            except Exception as e:
+                LOGGER.error(f"{e}: Aria2c, Error while taking status snapshot")
+                return
+            downloads = {}
+            for res in results:
+                # multicall wraps every successful result in a one-item list
+                if not isinstance(res, list) or not res:
+                    continue
+                for struct in res[0]:
+                    downloads[struct['gid']] = Download(aria2, struct)
+            self.__downloads = MappingProxyType(downloads)
+            self.__aria2_time = self.__aria2_taken = time()
+
+    def refresh_qbit(self, force=False):
+        if not force and not self.__qbit_stale():
+            return
+        with self.__qbit_lock:
+            if not force and not self.__qbit_stale():
+                return
+            if qbit_state.sync():
+                self.__qbit_time = time()
+
+    def refresh_all(self, force=False):
+        self.refresh_aria2(force)
+        self.refresh_qbit(force)
+
+    async def refresh(self, force=False):
+        await sync_to_async(self.refresh_all, force)
+
+    def invalidate(self):
+        self.__aria2_time = 0
+        self.__qbit_time = 0
+
+    def aria2_download(self, gid):
+        # Added after the last tick, it shows up once the next tick refreshes
+        return self.__downloads.get(gid)
+
+    def qbit_torrent(self, tag=None, hash=None):
+        return qbit_state.torrent(tag, hash)
+
+    @property
+    def aria2_taken(self):
+        return self.__aria2_taken
+
+    @property
+    def aria2_downloads(self):
+        return self.__downloads
+
+    @property
+    def qbit_torrents(self):
+        return qbit_state.torrents
+
+
+engine_snapshot = EngineSnapshot()
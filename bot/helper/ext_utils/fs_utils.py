@@ -11,6 +11,9 @@ from bot import aria2, DOWNLOAD_DIR, get_client, GLOBAL_EXTENSION_FILTER
 from bot.helper.ext_utils.bot_utils import sync_to_async, cmd_exec
 import os
 import logging
+import shutil
+import contextlib
+from fcntl import ioctl
 
 # Initialize the logger for this module
 logger = logging.getLogger(__name__)
@@ -25,6 +28,14 @@ FIRST_SPLIT_REGEX = re.compile(r'(\.|_)part0*1\.rar$|(\.|_)7z\.0*1$|(\.|_)zip\.0
 # Compile the regular expression pattern for identifying split archives
 SPLIT_REGEX = re.compile(r'\.r\d+$|\.7z\.\d+$|\.z\d+$|\.zip\.\d+$')
 
+# Patterns mapping every volume of a split set to (stem, kind), most specific first
+ARCHIVE_SET_REGEXES = (
+    (re.compile(r'^(.+)[._]part\d+\.rar$'), 'part'),
+    (re.compile(r'^(.+)\.(?:rar|r\d+)$'), 'rar'),
+    (re.compile(r'^(.+)\.7z\.\d+$'), '7z'),
+    (re.compile(r'^(.+)\.(?:zip|z\d+|zip\.\d+)$'), 'zip'),
+)
+
 
 async def is_first_archive_split(file: pathlib.Path) -> bool:
     return bool(FIRST_SPLIT_REGEX.search(file.name))
@@ -101,32 +112,96 @@ async def clean_unwanted(path: pathlib.Path) -> None:
                 logger.error(f"Error cleaning unwanted files/folders: {e}")
 
 
-async def get_path_size(path: pathlib.Path) -> int:
-    if not path.exists():
-        return 0
+# (st_dev, st_ino) of a folder -> (st_mtime_ns, files, subfolders) of its direct entries,
+# every file as (path, filtered, (st_ino, st_mtime_ns, st_size))
+_dir_stats_cache = {}
+DIR_STATS_CACHE_LIMIT = 100000
+
+
+def _file_key(st: os.stat_result) -> tuple:
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+def _cached_dir_stats(cached: tuple):
+    """Totals of a cached folder with every file re-stat'ed, None once one is gone."""
+    _, files, subfolders = cached
+    size = filtered = 0
+    for i, (f_path, is_filtered, key) in enumerate(files):
+        try:
+            st = os.stat(f_path)
+        except OSError:
+            return None
+        if _file_key(st) != key:
+            # Rewritten or still growing in place, its folder's mtime did not change
+            files[i] = (f_path, is_filtered, _file_key(st))
+        size += st.st_size
+        filtered += is_filtered
+    return size, len(files), filtered, subfolders
+
+
+def _dir_stats(path: str, use_cache: bool) -> tuple:
+    st = os.stat(path)
+    key = (st.st_dev, st.st_ino)
+    if use_cache and (cached := _dir_stats_cache.get(key)) is not None and cached[0] == st.st_mtime_ns \
+            and (stats := _cached_dir_stats(cached)) is not None:
+        return stats
+    size = filtered = 0
+    files = []
+    subfolders = []
+    filter_exts = tuple(f'.{ext}' for ext in GLOBAL_EXTENSION_FILTER)
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subfolders.append(entry.path)
+            elif entry.is_file():
+                f_st = entry.stat()
+                is_filtered = entry.name.lower().endswith(filter_exts)
+                files.append((entry.path, is_filtered, _file_key(f_st)))
+                size += f_st.st_size
+                filtered += is_filtered
+    if len(_dir_stats_cache) >= DIR_STATS_CACHE_LIMIT:
+        _dir_stats_cache.clear()
+    _dir_stats_cache[key] = (st.st_mtime_ns, files, tuple(subfolders))
+    return size, len(files), filtered, tuple(subfolders)
+
+
+def get_path_stats(path: str, use_cache: bool = True) -> tuple[int, int, int]:
+    """
+    Size, file count and folder count of ``path`` from one iterative scandir walk.
+
+    The entries of every folder are cached by (inode, mtime), so an unchanged
+    subtree is not listed again, only its folders and files are stat'ed. A file
+    growing in place does not bump its folder's mtime, so each file is checked
+    against its own (inode, mtime, size). ``use_cache=False`` lists every folder.
+    Files with a GLOBAL_EXTENSION_FILTER extension count towards the size only.
+    """
+    path = str(path)
+    try:
+        if not os.path.isdir(path):
+            return os.path.getsize(path), 1, 0
+    except OSError:
+        return 0, 0, 0
+    total_size = total_files = total_folders = 0
+    stack = [path]
+    while stack:
+        folder = stack.pop()
+        try:
+            size, files, filtered, subfolders = _dir_stats(folder, use_cache)
+        except OSError:
+            continue
+        total_size += size
+        total_files += files - filtered
+        total_folders += len(subfolders)
+        stack.extend(subfolders)
+    return total_size, total_files, total_folders
 
-    if path.is_file():
-        return path.stat().st_size
 
-    total_size = 0
-    async for child in path.glob("*"):
-        total_size += await get_path_size(child)
-    return total_size
+async def get_path_size(path: pathlib.Path) -> int:
+    return (await sync_to_async(get_path_stats, path))[0]
 
 
 async def count_files_and_folders(path: pathlib.Path) -> tuple[int, int]:
-    if not path.exists():
-        return 0, 0
-
-    total_files = 0
-    total_folders = 0
-    async for child in path.glob("*"):
-        if child.is_file():
-            total_files += 1
-            if child.suffix in GLOBAL_EXTENSION_FILTER:
-                total_files -= 1
-        elif child.is_dir():
-            total_folders += 1
+    _, total_files, total_folders = await sync_to_async(get_path_stats, path)
     return total_folders, total_files
 
 
@@ -140,6 +215,117 @@ def get_base_name(orig_path: str) -> str:
         return orig_path
 
 
+def archive_set_key(name: str) -> tuple:
+    for regex, kind in ARCHIVE_SET_REGEXES:
+        if match := regex.match(name):
+            return match.group(1), kind
+    return name, None
+
+
+def get_archive_sets(path: str) -> list:
+    """
+    Group the archives below ``path`` into independently extractable sets.
+
+    Returns ``(dirpath, first_volume, members)`` tuples where ``members`` are
+    ``(file_path, size)`` pairs of every volume of the set, so each set can be
+    extracted and cleaned up on its own.
+    """
+    archive_sets = []
+    for dirpath, _, files in os.walk(path, topdown=False):
+        sets = {}
+        for file_ in sorted(files):
+            if SPLIT_REGEX.search(file_) or any(file_.lower().endswith(ext) for ext in ARCH_EXT):
+                sets.setdefault(archive_set_key(file_), []).append(file_)
+        for members in sets.values():
+            first = next((file_ for file_ in members if FIRST_SPLIT_REGEX.search(file_)
+                          or not file_.endswith('.rar') and not SPLIT_REGEX.search(file_)), None)
+            if first is None:
+                continue
+            archive_sets.append((dirpath, os.path.join(dirpath, first), [
+                (f_path, os.path.getsize(f_path)) for f_path in (os.path.join(dirpath, file_) for file_ in members)]))
+    return archive_sets
+
+
+def parse_slt_listing(stdout: str) -> list:
+    """Parse the member blocks of ``7z l -slt`` into ``(path, size, is_dir, encrypted)`` tuples."""
+    entries = []
+    _, _, body = stdout.partition('\n----------\n')
+    for block in body.split('\n\n'):
+        props = dict(line.split(' = ', 1) for line in block.splitlines() if ' = ' in line)
+        if 'Path' not in props:
+            continue
+        entries.append((props['Path'], int(props.get('Size') or 0), props.get('Folder') == '+', props.get('Encrypted') == '+'))
+    return entries
+
+
+def extension_excluded(name: str, exts) -> bool:
+    lower = name.lower()
+    return any(lower.endswith(f'.{ext}') for ext in exts)
+
+
+def extracted_size(entries: list, exts=()) -> int:
+    """Bytes an extraction of ``entries`` writes when members with ``exts`` are skipped."""
+    return sum(size for m_path, size, is_dir, _ in entries if not is_dir and not extension_excluded(m_path, exts))
+
+
+# ioctl request cloning a whole file on btrfs/xfs (linux/fs.h FICLONE)
+FICLONE = 0x40049409
+
+
+def share_file(src: str, dest: str) -> None:
+    """Make ``dest`` share the blocks of ``src``: hardlink, else reflink, else copy. An existing ``dest`` is kept."""
+    # dest may be a hardlink of the seeded original, writing to it would truncate the seed
+    if os.path.lexists(dest):
+        return
+    try:
+        os.link(src, dest)
+        return
+    except OSError:
+        pass
+    try:
+        with open(src, 'rb') as fsrc, open(dest, 'xb') as fdest:
+            ioctl(fdest.fileno(), FICLONE, fsrc.fileno())
+        shutil.copystat(src, dest)
+        return
+    except FileExistsError:
+        return
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(dest)
+    shutil.copy2(src, dest)
+
+
+def link_tree(src: str, dest: str, skip: set = frozenset()) -> list:
+    """
+    Mirror ``src`` at ``dest`` without duplicating data on disk.
+
+    Seeding keeps the original files while the upload tree can be split,
+    renamed or deleted freely: removing a hardlink never touches the seeded copy.
+    Paths in ``skip`` and names already present at ``dest`` are left out. Returns ``(dest_path, size)`` of every file.
+    """
+    linked = []
+    if not os.path.isdir(src):
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        share_file(src, dest)
+        return [(dest, os.path.getsize(dest))]
+    stack = [(src, dest)]
+    while stack:
+        folder, target = stack.pop()
+        os.makedirs(target, exist_ok=True)
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.path in skip:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, f'{target}/{entry.name}'))
+                elif entry.is_file() and not entry.name.endswith(('.aria2', '.!qB')):
+                    if os.path.lexists(f'{target}/{entry.name}'):
+                        continue
+                    share_file(entry.path, f'{target}/{entry.name}')
+                    linked.append((f'{target}/{entry.name}', entry.stat().st_size))
+    return linked
+
+
 def get_mime_type(file_path: str) -> str:
     mime = magic.Magic(mime=True)
     mime_type = mime.from_file(file_path)
@@ -160,31 +346,108 @@ def check_storage_threshold(size: int, threshold: int, arch: bool = False, alloc
     return True
 
 
-async def join_files(path: pathlib.Path) -> None:
-    files = path.glob("*")
-    results = []
-    for file_ in files:
-        if file_.suffix == ".02" and (await file_.stat()).st_size == 0:
-            final_name = file_.with_suffix("").name
-            cmd = f"cat {final_name}.* > {final_name}"
-            process = await asyncio.create_subprocess_shell(
-                cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
-            if process.returncode != 0:
-                logger.error(f"Failed to join {final_name}, stderr: {stderr.decode()}")
-            else:
-                results.append(final_name)
-        else:
-            logger.info("No binary files to join!")
+# Numbered parts of a plain binary split (name.001, name.002...)
+JOIN_PART_REGEX = re.compile(r'^(.+)\.(\d+)$')
+JOIN_CHUNK = 64 * 1024 * 1024
+
+
+def get_join_sets(path: str) -> list:
+    """
+    Find the binary splits below ``path`` that can be joined.
+
+    Parts are ordered by their number, not by name, and a set needs its parts
+    numbered from 1 without gaps. Archive volumes (.7z.001, .zip.001...) are left
+    to 7z. Returns ``(dest, [(part_path, size)...])`` tuples.
+    """
+    join_sets = []
+    for dirpath, _, files in os.walk(path):
+        sets = {}
+        for file_ in files:
+            if (match := JOIN_PART_REGEX.match(file_)) and not SPLIT_REGEX.search(file_):
+                sets.setdefault(match.group(1), []).append((int(match.group(2)), file_))
+        for stem, parts in sets.items():
+            parts.sort()
+            if len(parts) < 2 or [number for number, _ in parts] != list(range(1, len(parts) + 1)) or stem in files:
+                continue
+            join_sets.append((os.path.join(dirpath, stem), [
+                (f_path, os.path.getsize(f_path)) for f_path in (os.path.join(dirpath, file_) for _, file_ in parts)]))
+    return join_sets
+
+
+def _copy_range(src_fd: int, dest_fd: int, size: int, on_copied=None, is_cancelled=None) -> None:
+    """Append ``size`` bytes of ``src_fd`` to ``dest_fd`` in the kernel, falling back to read/write."""
+    left = size
+    while left:
+        if is_cancelled is not None and is_cancelled():
+            raise InterruptedError
+        count = min(left, JOIN_CHUNK)
+        try:
+            copied = os.copy_file_range(src_fd, dest_fd, count)
+        except (AttributeError, OSError):
+            try:
+                copied = os.sendfile(dest_fd, src_fd, None, count)
+            except OSError:
+                buf = memoryview(os.read(src_fd, count))
+                copied = len(buf)
+                # write() may take only part of the buffer
+                while buf:
+                    buf = buf[os.write(dest_fd, buf):]
+        if copied == 0:
+            raise EOFError(f'{left} bytes missing')
+        left -= copied
+        if on_copied is not None:
+            on_copied(copied)
+
+
+def join_parts(dest: str, parts: list, on_copied=None, is_cancelled=None) -> bool:
+    """Concatenate ``parts`` into ``dest`` and delete them, ``dest`` is removed again on failure."""
+    try:
+        with open(dest, 'wb') as out:
+            for part, size in parts:
+                with open(part, 'rb') as src:
+                    _copy_range(src.fileno(), out.fileno(), size, on_copied, is_cancelled)
+    except (OSError, EOFError, InterruptedError) as e:
+        if not isinstance(e, InterruptedError):
+            logger.error(f"Failed to join {dest}: {e}")
+        with contextlib.suppress(OSError):
+            os.remove(dest)
+        return False
+    for part, _ in parts:
+        with contextlib.suppress(OSError):
+            os.remove(part)
+    return True
+
+
+async def join_files(path: str, status=None, is_cancelled=None, parallel: int = 2) -> list:
+    """
+    Join every binary split below ``path`` in worker threads, ``parallel`` sets at a time.
+
+    ``status`` gets the total part size and its ``update_progress`` the bytes
+    joined so far over all sets. Returns the joined file paths.
+    """
+    join_sets = await sync_to_async(get_join_sets, str(path))
+    if not join_sets:
+        logger.info("No binary files to join!")
+        return []
+    if status is not None:
+        status.size = sum(size for _, parts in join_sets for _, size in parts)
+    limit = asyncio.Semaphore(parallel)
+    # Keys are fixed up front so the worker threads only ever replace values
+    progress = dict.fromkeys((dest for dest, _ in join_sets), 0)
+
+    async def join_set(dest, parts):
+        def on_copied(copied):
+            progress[dest] += copied
+            if status is not None:
+                status.update_progress(sum(progress.values()))
+
+        async with limit:
+            return dest if await sync_to_async(join_parts, dest, parts, on_copied, is_cancelled) else None
+
+    results = [dest for dest in await asyncio.gather(*(join_set(*join_set_) for join_set_ in join_sets)) if dest]
     if results:
         logger.info("Join Completed!")
-        for res in results:
-            for file_ in files:
-                if file_.name.startswith(f"{res}.0"):
-                    await aiofiles.os.remove(file_)
+    return results
 
 
 async def main():
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+from bot import LOGGER
+
+# purpose -> (connector options, timeout options, session options)
+PROFILES = {
+    # Short API and page requests
+    'api': ({'limit': 100, 'limit_per_host': 10}, {'total': 60, 'sock_connect': 15}, {}),
+    # Long running uploads and downloads, only connect and idle reads time out
+    'transfer': ({'limit': 50, 'limit_per_host': 8}, {'total': None, 'sock_connect': 30, 'sock_read': 300}, {}),
+    # Search plugins and sites that may need the environment's proxy
+    'search': ({'limit': 20, 'limit_per_host': 5}, {'total': 60, 'sock_connect': 15}, {'trust_env': True}),
+}
+
+
+class SessionRegistry:
+    """
+    Process-wide aiohttp sessions keyed by purpose and optionally host.
+
+    Sessions are created on first use and then reused, so requests keep their
+    TCP/TLS connections alive and share a DNS cache instead of opening a new
+    session per call. Callers must not close what they get, ``close_all`` runs
+    on restart and shutdown.
+    """
+
+    def __init__(self):
+        self.__sessions = {}
+
+    def get(self, purpose='api', host=None):
+        key = (purpose, host)
+        if (session := self.__sessions.get(key)) is None or session.closed:
+            connector, timeout, options = PROFILES.get(purpose, PROFILES['api'])
+            session = self.__sessions[key] = ClientSession(
+                connector=TCPConnector(ttl_dns_cache=300, keepalive_timeout=60, **connector),
+                timeout=ClientTimeout(**timeout),
+                **options,
+            )
+        return session
+
+    async def close_all(self):
+        sessions, self.__sessions = list(self.__sessions.values()), {}
+        for session in sessions:
+            try:
+                await session.close()
+            except Exception as e:
+                LOGGER.error(f'Unable to close HTTP session: {e}')
+
+
+http_sessions = SessionRegistry()
+
+
+def get_session(purpose='api', host=None):
+    """Shared session for ``purpose`` ('api', 'transfer' or 'search'), one per ``host`` when given."""
+    return http_sessions.get(purpose, host)
@@ -1,10 +1,14 @@
 import asyncio
+import io
 import json
 import os
+import re
 import shlex
 from contextlib import suppress
+from html import escape
 from pathlib import Path
-from typing import List, Tuple
+from time import time
+from typing import List, Optional, Tuple
 
 import aiofiles
 import telegraph
@@ -51,3 +55,169 @@ async def is_multi_streams(path: str) -> bool:
             audios += 1
 
     return videos > 1 or audios > 1
+
+
+async def get_media_info(path: str) -> Tuple[int, Optional[str], Optional[str], int, int]:
+    """Duration in seconds, artist, title, width and height of a media file, zeros and None when unknown."""
+    try:
+        stdout, stderr, _ = await cmd_exec(["ffprobe", "-hide_banner", "-loglevel", "error", "-print_format", "json",
+                                            "-show_format", "-show_streams", str(path)])
+    except Exception as e:
+        bot.LOGGER.error(f"Get Media Info: {e}. Mostly File not found!")
+        return 0, None, None, 0, 0
+    if stderr:
+        bot.LOGGER.warning(f"Get Media Info: {stderr}")
+    try:
+        result = json.loads(stdout)
+    except json.JSONDecodeError:
+        bot.LOGGER.warning("Get Media Info: Invalid JSON data!")
+        return 0, None, None, 0, 0
+    fields = result.get("format") or {}
+    tags = {key.lower(): value for key, value in (fields.get("tags") or {}).items()}
+    video = next((stream for stream in result.get("streams", []) if stream.get("codec_type") == "video"), {})
+    return (round(float(fields.get("duration") or 0)), tags.get("artist"), tags.get("title"),
+            video.get("width", 0), video.get("height", 0))
+
+
+async def get_document_type(path: str) -> Tuple[bool, bool, bool]:
+    """``(is_video, is_audio, is_image)`` of a file, archives and unknown files are none of them."""
+    if path.lower().endswith(tuple(ARCH_EXT)) or re.search(r'.+(\.|_)(rar|7z|zip|bin)(\.0*\d+)?$', path):
+        return False, False, False
+    mime_type = await sync_to_async(get_mime_type, path)
+    if mime_type.startswith('audio'):
+        return False, True, False
+    if mime_type.startswith('image'):
+        return False, False, True
+    if not mime_type.startswith('video') and not mime_type.endswith('octet-stream'):
+        return False, False, False
+    try:
+        stdout, _, _ = await cmd_exec(["ffprobe", "-hide_banner", "-loglevel", "error", "-print_format", "json",
+                                       "-show_streams", str(path)])
+        streams = json.loads(stdout).get("streams") or []
+    except Exception as e:
+        bot.LOGGER.error(f"Get Document Type: {e}. Mostly File not found!")
+        return False, False, False
+    codecs = {stream.get("codec_type") for stream in streams}
+    is_video = "video" in codecs
+    return is_video, not is_video and "audio" in codecs, False
+
+
+async def take_ss(video_file: str, duration: int) -> Optional[str]:
+    """A frame from the middle of a video as a jpg thumbnail, None when ffmpeg fails."""
+    os.makedirs("Thumbnails", exist_ok=True)
+    des_path = os.path.join("Thumbnails", f"{time()}.jpg")
+    cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-ss", str((duration or 3) // 2), "-i", video_file,
+           "-vf", "thumbnail", "-frames:v", "1", des_path]
+    _, stderr, code = await cmd_exec(cmd)
+    if code != 0 or not os.path.exists(des_path):
+        bot.LOGGER.error(f"Error while extracting thumbnail. Name: {video_file} stderr: {stderr}")
+        return None
+    return des_path
+
+
+async def get_audio_thumb(audio_file: str) -> Optional[str]:
+    """The cover art embedded in an audio file, None when it has none."""
+    os.makedirs("Thumbnails", exist_ok=True)
+    des_path = os.path.join("Thumbnails", f"{time()}.jpg")
+    _, _, code = await cmd_exec(["ffmpeg", "-hide_banner", "-loglevel", "error", "-i", audio_file,
+                                 "-an", "-vcodec", "copy", des_path])
+    if code != 0 or not os.path.exists(des_path):
+        return None
+    return des_path
+
+
+async def format_filename(file_: str, user_id: int) -> Tuple[str, str]:
+    """
+    Leech file name and caption after the user's prefix, suffix, remname and caption.
+
+    Unset user values fall back to the LEECH_FILENAME_* settings. ``{filename}`` in
+    the caption is replaced with the final name.
+    """
+    user_dict = bot.user_data.get(user_id, {})
+    setting = lambda key, var: user_dict.get(key, bot.config_dict.get(var, ''))
+    if remname := setting('lremname', 'LEECH_FILENAME_REMNAME'):
+        # old:new|old2 regex rules, a rule without a replacement removes its match
+        for rule in remname.split('|'):
+            pattern, _, repl = rule.partition(':')
+            with suppress(re.error):
+                file_ = re.sub(pattern, repl, file_)
+    if suffix := setting('lsuffix', 'LEECH_FILENAME_SUFFIX'):
+        stem, ext = os.path.splitext(file_)
+        file_ = f"{stem} {suffix}{ext}"
+    if prefix := setting('lprefix', 'LEECH_FILENAME_PREFIX'):
+        file_ = f"{re.sub(r'<.*?>', '', prefix)} {file_}"
+    caption = setting('lcaption', 'LEECH_FILENAME_CAPTION')
+    return file_, caption.replace('{filename}', escape(file_)) if caption else ''
+
+
+class RangeReader(io.RawIOBase):
+    """
+    Read-only window over ``length`` bytes of a file starting at ``start``.
+
+    Uploaders that take a file-like object (pyrogram, aiohttp) see a standalone
+    file of ``length`` bytes named ``name``, so a large file can be sent as parts
+    without writing any part to disk.
+    """
+
+    def __init__(self, path: str, start: int, length: int, name: str):
+        self.__file = open(path, 'rb')
+        self.__start = start
+        self.__length = length
+        self.__pos = 0
+        self.name = name
+        self.__file.seek(start)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.__pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.__pos
+        elif whence == io.SEEK_END:
+            offset += self.__length
+        self.__pos = min(max(offset, 0), self.__length)
+        self.__file.seek(self.__start + self.__pos)
+        return self.__pos
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = self.__length - self.__pos
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+        data = self.__file.read(size)
+        self.__pos += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        self.__file.close()
+        super().close()
+
+
+def is_virtual_splittable(path: str) -> bool:
+    """Media needs ffmpeg to cut playable parts, anything else can be sent as raw byte ranges."""
+    mime_type = get_mime_type(path)
+    return not mime_type.startswith(('video', 'audio'))
+
+
+def plan_virtual_split(path: str, size: int, split_size: int, equal_splits: bool = False) -> List[Tuple[str, int, int]]:
+    """
+    Byte ranges a file is uploaded as, named like the volumes of ``split -b``.
+
+    :return: ``(part_name, start, length)`` for every part.
+    """
+    parts = -(-size // split_size)
+    if equal_splits:
+        split_size = -(-size // parts)
+    name = os.path.basename(path)
+    return [(f'{name}.{index + 1:03d}', start, min(split_size, size - start))
+            for index, start in enumerate(range(0, size, split_size))]
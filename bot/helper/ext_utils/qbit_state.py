@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+from threading import Lock
+from types import MappingProxyType
+
+from qbittorrentapi import TorrentDictionary
+
+from bot import get_client, LOGGER
+
+
+class QbitState:
+    """
+    In-memory torrent table kept in sync through qBittorrent's ``sync/maindata`` API.
+
+    Every call sends the last ``rid`` cursor back, so qBittorrent only returns the
+    fields that changed since the previous poll and the hashes that were removed.
+    Only those deltas are decoded and merged into the table.
+    """
+
+    def __init__(self):
+        self.__lock = Lock()
+        self.__rid = 0
+        self.__table = {}
+        self.__torrents = MappingProxyType({})
+        self.__tags = MappingProxyType({})
+
+    @staticmethod
+    def __split_tags(tor):
+        return [tag.strip() for tag in tor.get('tags', '').split(',') if tag.strip()]
+
+    def sync(self):
+        with self.__lock:
+            client = get_client()
+            try:
+                data = client.sync_maindata(rid=self.__rid)
+            except Exception as e:
+                LOGGER.error(f"{e}: Qbittorrent, Error while syncing maindata")
+                return False
+            tags = dict(self.__tags)
+            if data.get('full_update'):
+                self.__table = {}
+                tags = {}
+            for hash_, delta in (data.get('torrents') or {}).items():
+                old = self.__table.get(hash_)
+                tor = dict(old) if old is not None else {'hash': hash_}
+                tor.update(delta)
+                if old is None or 'tags' in delta:
+                    if old is not None:
+                        for tag in self.__split_tags(old):
+                            tags.pop(tag, None)
+                    for tag in self.__split_tags(tor):
+                        tags[tag] = hash_
+                # Copy-on-write so readers holding the previous row see a consistent object
+                self.__table[hash_] = TorrentDictionary(tor, client=client)
+            for hash_ in data.get('torrents_removed') or []:
+                if (old := self.__table.pop(hash_, None)) is not None:
+                    for tag in self.__split_tags(old):
+                        tags.pop(tag, None)
+            self.__rid = data.get('rid', self.__rid)
+            self.__torrents = MappingProxyType(dict(self.__table))
+            self.__tags = MappingProxyType(tags)
+            return True
+
+    def reset(self):
+        with self.__lock:
+            self.__rid = 0
+            self.__table = {}
+            self.__torrents = MappingProxyType({})
+            self.__tags = MappingProxyType({})
+
+    def torrent(self, tag=None, hash=None):
+        if tag is not None:
+            hash = self.__tags.get(tag)
+        return self.__torrents.get(hash)
+
+    @property
+    def torrents(self):
+        return self.__torrents
+
+    @property
+    def tags(self):
+        return self.__tags
+
+
+qbit_state = QbitState()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+from asyncio import Condition
+from errno import EXDEV
+from os import listdir, makedirs, rename, scandir
+from shutil import move
+
+
+class SameDirBarrier:
+    """
+    Barrier for the links of one multi-link ``sameDir`` group.
+
+    Tasks register when their download starts and leave when they finish or
+    fail. A finished task waits until it is the last one or a sibling is still
+    registered to receive its files, woken by those changes instead of polling.
+    """
+
+    def __init__(self, same_dir):
+        self.__same_dir = same_dir
+        self.__condition = Condition()
+
+    def __ready(self):
+        total = self.__same_dir['total']
+        return total in [1, 0] or total > 1 and len(self.__same_dir['tasks']) > 1
+
+    async def add(self, uid):
+        async with self.__condition:
+            self.__same_dir['tasks'].add(uid)
+            self.__condition.notify_all()
+
+    async def remove(self, uid):
+        async with self.__condition:
+            if uid in self.__same_dir['tasks']:
+                self.__same_dir['tasks'].remove(uid)
+                self.__same_dir['total'] -= 1
+            self.__condition.notify_all()
+
+    async def wait(self):
+        async with self.__condition:
+            await self.__condition.wait_for(self.__ready)
+
+
+def same_dir_barrier(same_dir):
+    if (barrier := same_dir.get('barrier')) is None:
+        barrier = same_dir['barrier'] = SameDirBarrier(same_dir)
+    return barrier
+
+
+def merge_folder(src, dest, prefix):
+    """
+    Move the entries of ``src`` into ``dest`` with one listing of ``dest``.
+
+    Entries are renamed, which is instant on the same filesystem whatever their
+    size, and only fall back to a copying move across filesystems. Names already
+    taken in ``dest`` get ``prefix-`` prepended.
+    """
+    makedirs(dest, exist_ok=True)
+    taken = set(listdir(dest))
+    with scandir(src) as entries:
+        for entry in entries:
+            if entry.name.endswith(('.aria2', '.!qB')):
+                continue
+            name = f'{prefix}-{entry.name}' if entry.name in taken else entry.name
+            taken.add(name)
+            try:
+                rename(entry.path, f'{dest}/{name}')
+            except OSError as e:
+                if e.errno != EXDEV:
+                    raise
+                move(entry.path, f'{dest}/{name}')
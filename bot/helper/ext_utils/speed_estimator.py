@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+from collections import deque
+from time import time
+
+SAMPLE_WINDOW = 8
+MIN_SAMPLE_GAP = 0.5
+SMOOTHING = 0.3
+
+
+class SpeedEstimator:
+    """
+    Exponentially weighted transfer rate over a short window of samples.
+
+    Feed it the cumulative processed byte count whenever it is known; ``speed``
+    and ``eta()`` are then cheap reads. The last ``SAMPLE_WINDOW`` samples live in
+    a ring buffer, so the rate follows real throughput changes instead of the
+    average since the task started.
+    """
+
+    __slots__ = ('__samples', '__rate', '__alpha', '__gap')
+
+    def __init__(self, window=SAMPLE_WINDOW, alpha=SMOOTHING, gap=MIN_SAMPLE_GAP):
+        self.__samples = deque(maxlen=window)
+        self.__rate = 0.0
+        self.__alpha = alpha
+        self.__gap = gap
+
+    def update(self, processed, now=None):
+        now = time() if now is None else now
+        if self.__samples:
+            last_time, last_bytes = self.__samples[-1]
+            if processed < last_bytes:
+                # Counter restarted (next file of a playlist, retried part, ...)
+                self.reset()
+            elif now - last_time < self.__gap:
+                return self.__rate
+        self.__samples.append((now, processed))
+        if len(self.__samples) > 1:
+            first_time, first_bytes = self.__samples[0]
+            if (elapsed := now - first_time) > 0:
+                window_rate = (processed - first_bytes) / elapsed
+                self.__rate = window_rate if self.__rate == 0 else \
+                    self.__alpha * window_rate + (1 - self.__alpha) * self.__rate
+        return self.__rate
+
+    def reset(self):
+        self.__samples.clear()
+        self.__rate = 0.0
+
+    @property
+    def speed(self):
+        return self.__rate
+
+    def eta(self, total, processed=None):
+        if processed is None:
+            processed = self.__samples[-1][1] if self.__samples else 0
+        if self.__rate <= 0 or total <= processed:
+            return 0 if total <= processed else None
+        return (total - processed) / self.__rate
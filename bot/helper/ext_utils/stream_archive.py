@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+from asyncio import Queue, run_coroutine_threadsafe, sleep
+from contextlib import suppress
+from os import path as ospath, remove, walk
+from subprocess import PIPE, Popen
+from tarfile import open as taropen
+from zipfile import ZIP_STORED, ZipFile
+
+from bot import LOGGER, bot_loop, GLOBAL_EXTENSION_FILTER
+from bot.helper.ext_utils.bot_utils import sync_to_async
+
+try:
+    from zstandard import ZstdCompressor
+except ImportError:
+    ZstdCompressor = None
+
+
+class CancelledArchive(Exception):
+    pass
+
+
+class VolumeSink:
+    """
+    Write-only stream cut into ``volume_size`` files named ``base.001``, ``base.002``...
+
+    Volumes are handed to the event loop as soon as they are closed and the
+    archiver thread blocks until the consumer picked the previous one up, so at
+    most one finished volume waits on disk while the next one is written.
+    Without ``volume_size`` everything goes to ``base`` itself.
+    """
+
+    def __init__(self, base, volume_size, queue, status=None, is_cancelled=None):
+        self.__base = base
+        self.__status = status
+        self.__is_cancelled = is_cancelled
+        self.__volume_size = volume_size
+        self.__queue = queue
+        self.__index = 0
+        self.__file = None
+        self.__left = 0
+        self.written = 0
+        self.cancelled = False
+
+    def __next_volume(self):
+        self.__close_volume()
+        self.__index += 1
+        name = f'{self.__base}.{self.__index:03d}' if self.__volume_size else self.__base
+        self.__file = open(name, 'wb')
+        self.__left = self.__volume_size or float('inf')
+
+    def __close_volume(self):
+        if self.__file is not None:
+            self.__file.close()
+            run_coroutine_threadsafe(self.__queue.put(self.__file.name), bot_loop).result()
+            self.__file = None
+
+    def write(self, data):
+        if self.cancelled or self.__is_cancelled is not None and self.__is_cancelled():
+            raise CancelledArchive
+        view = memoryview(data)
+        while view:
+            if self.__file is None or self.__left == 0:
+                self.__next_volume()
+            chunk = view[:int(min(self.__left, len(view)))]
+            self.__file.write(chunk)
+            self.__left -= len(chunk)
+            self.written += len(chunk)
+            view = view[len(chunk):]
+        if self.__status is not None:
+            self.__status.update_progress(self.written)
+        return len(data)
+
+    def flush(self):
+        if self.__file is not None:
+            self.__file.flush()
+
+    def close(self):
+        self.__close_volume()
+
+    def abort(self):
+        """Drop the volume being written, a cancelled or failed archive must not hand it over."""
+        if self.__file is not None:
+            self.__file.close()
+            try:
+                remove(self.__file.name)
+            except OSError:
+                pass
+            self.__file = None
+
+
+def _members(src):
+    filter_exts = tuple(f'.{ext}' for ext in GLOBAL_EXTENSION_FILTER)
+    root = ospath.dirname(src)
+    if ospath.isfile(src):
+        yield src, ospath.basename(src)
+        return
+    for dirpath, _, files in walk(src):
+        for file_ in sorted(files):
+            if not file_.lower().endswith(filter_exts):
+                f_path = ospath.join(dirpath, file_)
+                yield f_path, ospath.relpath(f_path, root)
+
+
+def write_archive(src, sink, fmt='zip', level=3):
+    """Write ``src`` to ``sink`` as a store-only zip, a tar or a multithreaded zstd tar, without seeking."""
+    if fmt == 'zip':
+        with ZipFile(sink, 'w', ZIP_STORED, allowZip64=True) as archive:
+            for f_path, arcname in _members(src):
+                archive.write(f_path, arcname)
+        return
+    if fmt == 'tar.zst':
+        from bot.helper.ext_utils.zip_profiles import profile_threads
+        # Sized like 7z's -mmt, so one job stays within its share of the cores
+        stream = ZstdCompressor(level=level, threads=profile_threads()).stream_writer(sink, closefd=False)
+    else:
+        stream = sink
+    with taropen(fileobj=stream, mode='w|') as archive:
+        for f_path, arcname in _members(src):
+            archive.add(f_path, arcname)
+    if stream is not sink:
+        stream.close()
+
+
+def archive_formats():
+    return ['zip', 'tar', 'tar.zst'] if ZstdCompressor is not None else ['zip', 'tar']
+
+
+async def stream_archive(src, base, volume_size, consumer, fmt='zip', status=None, is_cancelled=None, level=3):
+    """
+    Archive ``src`` into volumes at ``base`` and await ``consumer(volume_path)`` for each one.
+
+    Consumers upload and may delete the volume, which is what keeps disk usage at
+    about one volume. Returns the archived byte count.
+    """
+    queue = Queue(maxsize=1)
+    sink = VolumeSink(base, volume_size, queue, status, is_cancelled)
+
+    def archive():
+        try:
+            write_archive(src, sink, fmt, level)
+            sink.close()
+        except BaseException:
+            sink.abort()
+            raise
+        finally:
+            run_coroutine_threadsafe(queue.put(None), bot_loop).result()
+
+    task = bot_loop.create_task(sync_to_async(archive))
+    try:
+        while (volume := await queue.get()) is not None:
+            await consumer(volume)
+    except BaseException:
+        # Unblock the archiver thread, its next write raises CancelledArchive
+        sink.cancelled = True
+        while not task.done():
+            while not queue.empty():
+                queue.get_nowait()
+            await sleep(0.1)
+        if not task.cancelled():
+            task.exception()
+        raise
+    await task
+    return sink.written
+
+
+class PipeSink:
+    """Write-only wrapper around a pipe that reports progress and stops the archiver on cancel."""
+
+    def __init__(self, pipe, status=None, is_cancelled=None):
+        self.__pipe = pipe
+        self.__status = status
+        self.__is_cancelled = is_cancelled
+        self.written = 0
+
+    def write(self, data):
+        if self.__is_cancelled is not None and self.__is_cancelled():
+            raise CancelledArchive
+        self.__pipe.write(data)
+        self.written += len(data)
+        if self.__status is not None:
+            self.__status.update_progress(self.written)
+        return len(data)
+
+    def flush(self):
+        self.__pipe.flush()
+
+
+def _rcat(src, remote_path, fmt, flags, sink_args, level):
+    proc = Popen(['rclone', 'rcat', *flags, remote_path], stdin=PIPE)
+    sink = PipeSink(proc.stdin, *sink_args)
+    try:
+        write_archive(src, sink, fmt, level)
+        proc.stdin.close()
+    except BaseException as e:
+        # Killed before stdin closes, so rclone never stores the truncated stream as the file
+        proc.kill()
+        with suppress(OSError):
+            proc.stdin.close()
+        proc.wait()
+        if isinstance(e, CancelledArchive):
+            return -9, sink.written
+        raise
+    return proc.wait(), sink.written
+
+
+async def rclone_rcat(src, remote_path, fmt='zip', flags=(), status=None, is_cancelled=None, level=3):
+    """
+    Stream the archive of ``src`` straight into ``rclone rcat``, nothing is written locally.
+
+    Returns rclone's exit code, -9 when cancelled, and the archived byte count.
+    """
+    code, written = await sync_to_async(_rcat, src, remote_path, fmt, list(flags), (status, is_cancelled), level)
+    if code not in (0, -9):
+        LOGGER.error(f'rclone rcat exited with {code}: {remote_path}')
+    return code, written
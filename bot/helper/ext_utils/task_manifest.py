@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+from os import scandir, stat
+from os.path import isdir
+from re import escape, fullmatch
+from typing import NamedTuple
+
+from bot import GLOBAL_EXTENSION_FILTER
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.fs_utils import ARCH_EXT, FIRST_SPLIT_REGEX, SPLIT_REGEX
+
+
+class ManifestEntry(NamedTuple):
+    size: int
+    archive: bool
+    split: bool
+    filtered: bool
+
+
+def _entry(name, size):
+    lower = name.lower()
+    return ManifestEntry(
+        size,
+        bool(FIRST_SPLIT_REGEX.search(name)) or any(lower.endswith(ext) for ext in ARCH_EXT),
+        bool(SPLIT_REGEX.search(name)),
+        any(lower.endswith(f'.{ext}') for ext in GLOBAL_EXTENSION_FILTER),
+    )
+
+
+def _scan(root):
+    files, folders = {}, set()
+    if not isdir(root):
+        try:
+            files[root] = _entry(root.rsplit('/', 1)[-1], stat(root).st_size)
+        except OSError:
+            pass
+        return files, folders
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        folders.add(folder)
+        try:
+            with scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        files[entry.path] = _entry(entry.name, entry.stat().st_size)
+        except OSError:
+            continue
+    return files, folders
+
+
+class TaskManifest:
+    """
+    Every file of a task with its size and archive/split/filter flags.
+
+    Built with one ``os.scandir`` pass in a worker thread when the download
+    completes. Stages that rewrite the tree (extract, zip, split) rescan or forget
+    only the paths they touched, and later stages and uploaders read sizes and
+    counts from here instead of walking the filesystem again.
+    """
+
+    def __init__(self):
+        self.__files = {}
+        self.__folders = set()
+
+    @classmethod
+    async def build(cls, path):
+        manifest = cls()
+        await manifest.rescan(path)
+        return manifest
+
+    @staticmethod
+    def __under(item, path):
+        return path is None or item == path or item.startswith(f'{path.rstrip("/")}/')
+
+    async def rescan(self, path):
+        files, folders = await sync_to_async(_scan, path)
+        self.forget(path)
+        self.__files.update(files)
+        self.__folders.update(folders)
+
+    @staticmethod
+    def __output_of(item, path):
+        """Whether ``item`` is ``path`` or one of its volumes (``path.001``...)."""
+        return fullmatch(rf'{escape(path)}(\.\d+)?', item) is not None
+
+    async def rescan_outputs(self, path):
+        """Pick up ``path`` and its sibling volumes without walking the parent."""
+        folder = path.rsplit('/', 1)[0]
+        self.forget(*(item for item in self.__files if self.__output_of(item, path)))
+        for item in await sync_to_async(lambda: [entry.path for entry in scandir(folder) if self.__output_of(entry.path, path)]):
+            await self.rescan(item)
+
+    def outputs(self, path):
+        """``path`` and its volumes as ``files`` returns them."""
+        return [(item, entry) for item, entry in self.__files.items() if self.__output_of(item, path)]
+
+    def forget(self, *paths):
+        """Drop ``paths`` and everything below them, files are dropped directly and folders in one pass."""
+        folders = []
+        for path in paths:
+            if self.__files.pop(path, None) is None:
+                folders.append(path.rstrip('/'))
+        if not folders:
+            return
+        prefixes = tuple(f'{folder}/' for folder in folders)
+        self.__files = {item: entry for item, entry in self.__files.items() if not item.startswith(prefixes)}
+        self.__folders = {item for item in self.__folders if item not in folders and not item.startswith(prefixes)}
+
+    def add(self, path, size):
+        self.__files[path] = _entry(path.rsplit('/', 1)[-1], size)
+
+    def files(self, path=None):
+        return [(item, entry) for item, entry in self.__files.items() if self.__under(item, path)]
+
+    def size(self, path=None):
+        return sum(entry.size for item, entry in self.__files.items() if self.__under(item, path))
+
+    def count(self, path=None):
+        """Files (without filtered extensions) and sub-folders below ``path``."""
+        files = sum(1 for item, entry in self.__files.items() if not entry.filtered and self.__under(item, path))
+        folders = sum(1 for item in self.__folders if item != path and self.__under(item, path))
+        return files, folders
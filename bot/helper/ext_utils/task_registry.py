@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+from threading import RLock
+from types import MappingProxyType
+
+from bot import LOGGER
+
+
+def _read(task, attr):
+    value = getattr(task, attr, None)
+    try:
+        return value() if callable(value) else value
+    except Exception as e:
+        LOGGER.error(f'TaskRegistry: {e} while reading {attr}')
+        return None
+
+
+class TaskRegistry(dict):
+    """
+    Drop-in replacement for the plain ``download_dict`` keyed by message id.
+
+    Writes keep secondary indexes by gid, user id, chat id and status, so lookups
+    no longer scan every status object. Every write also publishes a new read-only
+    snapshot; readers use ``snapshot()``/``by_*`` without taking ``download_dict_lock``.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.__lock = RLock()
+        self.__keys = {}
+        self.__gids = {}
+        self.__users = {}
+        self.__chats = {}
+        self.__statuses = {}
+        self.__snapshot = MappingProxyType({})
+
+    # Index buckets are frozensets replaced on write, so lock-free readers never
+    # iterate a set that is being mutated
+    @staticmethod
+    def __add(index, key, uid):
+        if key is not None:
+            index[key] = index.get(key, frozenset()) | {uid}
+
+    @staticmethod
+    def __discard(index, key, uid):
+        if key is not None and (uids := index.get(key)) is not None:
+            if uids := uids - {uid}:
+                index[key] = uids
+            else:
+                del index[key]
+
+    def __unindex(self, uid):
+        if (keys := self.__keys.pop(uid, None)) is None:
+            return
+        gid, user_id, chat_id, status = keys
+        if gid is not None and self.__gids.get(gid) == uid:
+            del self.__gids[gid]
+        self.__discard(self.__users, user_id, uid)
+        self.__discard(self.__chats, chat_id, uid)
+        self.__discard(self.__statuses, status, uid)
+
+    @staticmethod
+    def __read_keys(task):
+        message = getattr(task, 'message', None)
+        user_id = message.from_user.id if message is not None and message.from_user else None
+        chat_id = message.chat.id if message is not None else None
+        return _read(task, 'gid'), user_id, chat_id, _read(task, 'status')
+
+    def __index(self, uid, task, keys=None):
+        gid, user_id, chat_id, status = keys or self.__read_keys(task)
+        self.__keys[uid] = (gid, user_id, chat_id, status)
+        if gid is not None:
+            self.__gids[gid] = uid
+        self.__add(self.__users, user_id, uid)
+        self.__add(self.__chats, chat_id, uid)
+        self.__add(self.__statuses, status, uid)
+
+    def __publish(self):
+        self.__snapshot = MappingProxyType(dict(self))
+
+    def __setitem__(self, uid, task):
+        with self.__lock:
+            self.__unindex(uid)
+            super().__setitem__(uid, task)
+            self.__index(uid, task)
+            self.__publish()
+
+    def __delitem__(self, uid):
+        with self.__lock:
+            super().__delitem__(uid)
+            self.__unindex(uid)
+            self.__publish()
+
+    def pop(self, uid, *default):
+        with self.__lock:
+            if uid not in self:
+                if default:
+                    return default[0]
+                raise KeyError(uid)
+            task = super().pop(uid)
+            self.__unindex(uid)
+            self.__publish()
+            return task
+
+    def clear(self):
+        with self.__lock:
+            super().clear()
+            for index in (self.__keys, self.__gids, self.__users, self.__chats, self.__statuses):
+                index.clear()
+            self.__publish()
+
+    def update(self, *args, **kwargs):
+        for uid, task in dict(*args, **kwargs).items():
+            self[uid] = task
+
+    def setdefault(self, uid, task=None):
+        with self.__lock:
+            if uid not in self:
+                self[uid] = task
+            return self[uid]
+
+    def reindex(self, uid):
+        """Re-read gid and status of a task whose state changed in place."""
+        with self.__lock:
+            if (task := self.get(uid)) is None:
+                return
+            self.__unindex(uid)
+            self.__index(uid, task)
+
+    def reindex_all(self):
+        """
+        Pick up engine-side status changes, called once per status tick.
+
+        Statuses are read from the snapshot without the lock, which is only taken
+        for the tasks whose keys changed and are still the same object.
+        """
+        for uid, task in self.__snapshot.items():
+            keys = self.__read_keys(task)
+            if self.__keys.get(uid) == keys:
+                continue
+            with self.__lock:
+                if self.get(uid) is task:
+                    self.__unindex(uid)
+                    self.__index(uid, task, keys)
+
+    def snapshot(self):
+        return self.__snapshot
+
+    def __tasks(self, uids):
+        snapshot = self.__snapshot
+        return [snapshot[uid] for uid in uids if uid in snapshot]
+
+    def by_uid(self, uid):
+        return self.__snapshot.get(uid)
+
+    def by_gid(self, gid):
+        if (uid := self.__gids.get(gid)) is not None:
+            return self.__snapshot.get(uid)
+
+    def by_user(self, user_id):
+        return self.__tasks(self.__users.get(user_id, ()))
+
+    def by_chat(self, chat_id):
+        return self.__tasks(self.__chats.get(chat_id, ()))
+
+    def by_status(self, status, live=False):
+        """
+        Tasks indexed under ``status``, as of the last write or status tick.
+
+        ``live`` reads every task's current status instead, for actions such as
+        cancelling that must not act on a stale index.
+        """
+        if live:
+            return [task for task in self.__snapshot.values() if _read(task, 'status') == status]
+        return self.__tasks(self.__statuses.get(status, ()))
+
+    def count_user(self, user_id):
+        return len(self.__users.get(user_id, ()))
+
+    def count_status(self, status):
+        return len(self.__statuses.get(status, ()))
@@ -7,6 +7,8 @@ from typing import Any, Dict, List, Optional, Union
 import aiohttp
 from telegraph import Telegraph, exceptions as tg_exceptions
 
+from bot.helper.ext_utils.http_session import get_session
+
 logger = logging.getLogger(__name__)
 
 class TelegraphHelper:
@@ -195,9 +197,8 @@ class TelegraphHelper:
             Union[Dict[str, Any], None]: The response from the Telegraph API, or None if an error occurred.
         """
         try:
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                response = await request_func(session, *args, **kwargs)
-                return response
+            response = await request_func(get_session('api', 'telegra.ph'), *args, **kwargs)
+            return response
         except tg_exceptions.RetryAfterError as e:
             if retry_on_flood_control:
                 logger.warning(
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+from asyncio import Condition, Lock
+from contextlib import asynccontextmanager
+
+from pyrogram import Client
+
+from bot import LOGGER, bot, user, config_dict
+
+# Largest file a (non-premium) account may upload, premium accounts get twice as much
+UPLOAD_LIMIT = 2097152000
+
+
+def _slots():
+    """Uploads each client runs at once, LEECH_PARALLEL (default 2)."""
+    return max(int(config_dict.get('LEECH_PARALLEL') or 2), 1)
+
+
+class UploadClientPool:
+    """
+    Telegram clients leech uploads are spread over.
+
+    The bot is always in the pool. The user session and the bots listed in
+    HELPER_BOT_TOKENS join it for chats they can post in, private chats are only
+    served by the bot so files never arrive from another account. Every client
+    has LEECH_PARALLEL upload slots, ``acquire`` hands out the client with the
+    most free slots and the fewest bytes in flight, and waits when all are busy.
+    Helper bots are started on first use.
+    """
+
+    def __init__(self):
+        self.__helpers = {}
+        self.__failed = set()
+        self.__retired = set()
+        self.__busy = {}
+        self.__inflight = {}
+        self.__usable = {}
+        self.__start_lock = Lock()
+        self.__cond = Condition()
+
+    async def __sync_helpers(self):
+        tokens = (config_dict.get('HELPER_BOT_TOKENS') or '').split()
+        async with self.__start_lock:
+            for token in [token for token in self.__helpers if token not in tokens]:
+                await self.__retire(self.__helpers.pop(token))
+            self.__failed &= set(tokens)
+            for token in tokens:
+                if token in self.__helpers or token in self.__failed:
+                    continue
+                client = Client(f'helper_{token.split(":", 1)[0]}', api_id=config_dict['TELEGRAM_API'],
+                                api_hash=config_dict['TELEGRAM_HASH'], bot_token=token, in_memory=True, no_updates=True)
+                try:
+                    await client.start()
+                except Exception as e:
+                    LOGGER.error(f'Unable to start helper bot {token.split(":", 1)[0]}: {e}')
+                    self.__failed.add(token)
+                    continue
+                self.__helpers[token] = client
+        return list(self.__helpers.values())
+
+    async def __retire(self, client):
+        if self.__busy.get(client):
+            self.__retired.add(client)
+            return
+        self.__retired.discard(client)
+        self.__busy.pop(client, None)
+        self.__inflight.pop(client, None)
+        self.__usable = {key: value for key, value in self.__usable.items() if key[0] is not client}
+        try:
+            await client.stop()
+        except Exception as e:
+            LOGGER.error(f'Unable to stop helper bot: {e}')
+
+    async def __can_post(self, client, chat_id):
+        key = (client, chat_id)
+        if key not in self.__usable:
+            try:
+                await client.get_chat(chat_id)
+                self.__usable[key] = True
+            except Exception as e:
+                LOGGER.warning(f'Upload client {client.name} can not use chat {chat_id}: {e}')
+                self.__usable[key] = False
+        return self.__usable[key]
+
+    def forbid(self, client, chat_id):
+        """Stop handing ``client`` out for ``chat_id``, e.g. after it was refused to post there."""
+        if client is not bot:
+            self.__usable[(client, chat_id)] = False
+
+    async def clients(self, chat_id):
+        """Clients that may post in ``chat_id``, the bot first."""
+        # Users and private chats have positive ids, groups and channels negative ones
+        if int(chat_id) > 0:
+            return [bot]
+        clients = [bot]
+        for client in ([user] if user else []) + await self.__sync_helpers():
+            if await self.__can_post(client, chat_id):
+                clients.append(client)
+        return clients
+
+    @staticmethod
+    def fits(client, size):
+        premium = getattr(getattr(client, 'me', None), 'is_premium', False)
+        return size <= UPLOAD_LIMIT * (2 if premium else 1)
+
+    def __free(self, client):
+        return _slots() - self.__busy.get(client, 0)
+
+    @asynccontextmanager
+    async def acquire(self, size, clients):
+        """
+        One upload slot on the member of ``clients`` with the most spare capacity.
+
+        Clients that can't upload ``size`` bytes or were retired are skipped, the
+        bot is used when none is left so the upload fails with Telegram's own error.
+        """
+        candidates = [client for client in clients if client not in self.__retired
+                      and client.is_connected and self.fits(client, size)] or [bot]
+        async with self.__cond:
+            await self.__cond.wait_for(lambda: any(self.__free(client) > 0 for client in candidates))
+            client = max((client for client in candidates if self.__free(client) > 0),
+                         key=lambda client: (self.__free(client), -self.__inflight.get(client, 0)))
+            self.__busy[client] = self.__busy.get(client, 0) + 1
+            self.__inflight[client] = self.__inflight.get(client, 0) + size
+        try:
+            yield client
+        finally:
+            async with self.__cond:
+                self.__busy[client] -= 1
+                self.__inflight[client] -= size
+                self.__cond.notify_all()
+            if client in self.__retired:
+                await self.__retire(client)
+
+    @staticmethod
+    def capacity(clients):
+        """Uploads ``clients`` run at once in total."""
+        return _slots() * len(clients)
+
+    def load(self):
+        """``(name, busy slots, bytes in flight)`` of every client with uploads running."""
+        return [(client.name, busy, self.__inflight.get(client, 0)) for client, busy in self.__busy.items() if busy]
+
+    async def stop_helpers(self):
+        async with self.__start_lock:
+            helpers, self.__helpers = list(self.__helpers.values()), {}
+            self.__failed.clear()
+        for client in helpers:
+            await self.__retire(client)
+
+
+upload_clients = UploadClientPool()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+from lzma import compress as lzma_compress
+from os import cpu_count, path as ospath, walk
+
+from bot import config_dict
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.stream_archive import ZstdCompressor
+
+# name -> (format, level); 'zip' is a store-only stream, 'tar.zst' a streamed zstd tar, '7z' goes through 7z
+ZIP_PROFILES = {
+    'store': ('zip', 0),
+    'zstd-fast': ('tar.zst', 3),
+    'zstd': ('tar.zst', 9),
+    'zstd-max': ('tar.zst', 19),
+    '7z': ('7z', 5),
+    '7z-max': ('7z', 9),
+}
+PROFILE_EXTENSIONS = {'zip': 'zip', 'tar.zst': 'tar.zst', '7z': '7z'}
+# 7z -mx level a zstd profile runs at when a password forces 7z, zstd levels go up to 22 and 7z's only to 9
+SEVEN_ZIP_FALLBACK = {'zstd-fast': 1, 'zstd': 5, 'zstd-max': 9}
+SAMPLE_FILES = 8
+SAMPLE_SIZE = 1024 * 1024
+
+
+def available_profiles():
+    return [name for name, (fmt, _) in ZIP_PROFILES.items() if fmt != 'tar.zst' or ZstdCompressor is not None]
+
+
+def get_zip_profile(user_dict, task_profile=None):
+    """Task flag first, then the user setting, then ZIP_PROFILE; anything unknown falls back to store."""
+    for name in (task_profile, user_dict.get('zip_profile'), config_dict.get('ZIP_PROFILE')):
+        if name in available_profiles():
+            return name
+    return 'store'
+
+
+def profile_settings(profile, pswd=''):
+    """(format, level) ``profile`` runs with, a zstd tar has no encryption so a password moves it to 7z."""
+    fmt, level = ZIP_PROFILES[profile]
+    if pswd and fmt == 'tar.zst':
+        return '7z', SEVEN_ZIP_FALLBACK[profile]
+    return fmt, level
+
+
+def profile_threads():
+    """7z -mmt value: the CPU cores shared evenly between the QUEUE_CPU stage slots."""
+    cores = cpu_count() or 1
+    return max(1, cores // (config_dict.get('QUEUE_CPU') or cores))
+
+
+def _estimate_ratio(src, fmt, level):
+    if fmt == 'zip':
+        return 1.0
+    raw = packed = 0
+    paths = [src] if ospath.isfile(src) else (ospath.join(dirpath, file_) for dirpath, _, files in walk(src) for file_ in files)
+    for index, f_path in enumerate(paths):
+        if index == SAMPLE_FILES:
+            break
+        try:
+            with open(f_path, 'rb') as f:
+                sample = f.read(SAMPLE_SIZE)
+        except OSError:
+            continue
+        raw += len(sample)
+        if fmt == 'tar.zst':
+            packed += len(ZstdCompressor(level=level).compress(sample))
+        else:
+            packed += len(lzma_compress(sample, preset=min(level, 9)))
+    return packed / raw if raw else 1.0
+
+
+async def estimate_ratio(src, profile, pswd=''):
+    """Output/input ratio of ``profile`` (with ``pswd``) measured on the first MiB of a few files of ``src``."""
+    fmt, level = profile_settings(profile, pswd)
+    return await sync_to_async(_estimate_ratio, src, fmt, level)
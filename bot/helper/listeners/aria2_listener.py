@@ -1,35 +1,100 @@
-import asyncio  # Importing the asyncio library for asynchronous programming
-import logging  # Importing the logging library for logging purposes
-
-# Setting up the logger
-logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
-
-async def main():
-    # Using asyncio.gather to run multiple coroutines concurrently
-    await asyncio.gather(
-        task1(),
-        task2(),
-        task3()
-    )
-
-async def task1():
-    logging.info('Task 1 started')
-    await asyncio.sleep(1)
-    logging.info('Task 1 completed')
-
-async def task2():
-    logging.info('Task 2 started')
-    await asyncio.sleep(2)
-    logging.info('Task 2 completed')
-
-async def task3():
-    logging.info('Task 3 started')
-    await asyncio.sleep(3)
-    logging.info('Task 3 completed')
-
-if __name__ == "__main__":
-    # Running the main function
-    start_time = time.perf_counter()
-    asyncio.run(main())
-    end_time = time.perf_counter()
-    logging.info(f'Total time taken: {end_time - start_time:.4f} seconds')
+#!/usr/bin/env python3
+from asyncio import sleep
+
+from aria2p import Download
+
+from bot import aria2, download_dict, LOGGER
+from bot.helper.ext_utils.aria2_rpc import aria2_ws
+from bot.helper.ext_utils.engine_snapshot import engine_snapshot
+from bot.helper.ext_utils.fs_utils import clean_unwanted
+from bot.helper.telegram_helper.message_utils import update_all_messages
+
+
+async def __get_download(gid):
+    try:
+        return Download(aria2, await aria2_ws.tell_status(gid))
+    except Exception as e:
+        LOGGER.error(f'onAria2Event: {e} GID: {gid}')
+        return None
+
+
+async def __onDownloadStarted(gid):
+    engine_snapshot.invalidate()
+    if (download := await __get_download(gid)) is None:
+        return
+    if download.options.follow_torrent == 'false':
+        return
+    LOGGER.info(f'onDownloadStarted: {download.name} - Gid: {gid}')
+
+
+async def __onDownloadComplete(gid):
+    engine_snapshot.invalidate()
+    if (download := await __get_download(gid)) is None:
+        return
+    if download.options.follow_torrent == 'false':
+        return
+    if download.followed_by_ids:
+        new_gid = download.followed_by_ids[0]
+        LOGGER.info(f'Gid changed from {gid} to {new_gid}')
+        if dl := download_dict.by_gid(gid):
+            download_dict.reindex(dl.listener().uid)
+        if dl := download_dict.by_gid(new_gid):
+            listener = dl.listener()
+            if listener.select:
+                await aria2_ws.force_pause(new_gid)
+        await update_all_messages()
+    elif download.bittorrent:
+        if (dl := download_dict.by_gid(gid)) and dl.seeding:
+            LOGGER.info(f'Cancelling Seed: {download.name} onDownloadComplete')
+            await dl.listener().onUploadError(f'Seeding stopped with Ratio: {dl.ratio()} and Time: {dl.seeding_time()}')
+            await aria2_ws.remove(gid)
+    else:
+        LOGGER.info(f'onDownloadComplete: {download.name} - Gid: {gid}')
+        if dl := download_dict.by_gid(gid):
+            await dl.listener().onDownloadComplete()
+            await aria2_ws.remove(gid)
+
+
+async def __onBtDownloadComplete(gid):
+    engine_snapshot.invalidate()
+    if (download := await __get_download(gid)) is None:
+        return
+    LOGGER.info(f'onBtDownloadComplete: {download.name} - Gid: {gid}')
+    if not (dl := download_dict.by_gid(gid)):
+        return
+    listener = dl.listener()
+    if listener.select:
+        await clean_unwanted(download.dir)
+    await listener.onDownloadComplete()
+    if not listener.seed:
+        await aria2_ws.remove(gid)
+
+
+async def __onDownloadError(gid):
+    engine_snapshot.invalidate()
+    LOGGER.info(f'onDownloadError: {gid}')
+    error = 'None'
+    if (download := await __get_download(gid)) is not None:
+        if download.options.follow_torrent == 'false':
+            return
+        error = download.error_message
+        LOGGER.info(f'Download Error: {error}')
+    if dl := download_dict.by_gid(gid):
+        await dl.listener().onDownloadError(error)
+
+
+async def __onDownloadStopped(gid):
+    engine_snapshot.invalidate()
+    # A user cancel also stops the download, give it time to leave download_dict
+    await sleep(6)
+    if dl := download_dict.by_gid(gid):
+        await dl.listener().onDownloadError('Dead torrent!')
+
+
+def start_aria2_listener():
+    aria2_ws.on('aria2.onDownloadStart', __onDownloadStarted)
+    aria2_ws.on('aria2.onDownloadComplete', __onDownloadComplete)
+    aria2_ws.on('aria2.onBtDownloadComplete', __onBtDownloadComplete)
+    aria2_ws.on('aria2.onDownloadError', __onDownloadError)
+    aria2_ws.on('aria2.onDownloadStop', __onDownloadStopped)
+    aria2_ws.start()
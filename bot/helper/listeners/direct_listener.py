@@ -2,14 +2,15 @@ import aiohttp
 import asyncio
 from functools import wraps
 
+from bot.helper.ext_utils.http_session import get_session
+
 import logging
 
 logger = logging.getLogger(__name__)
 
 async def aiohttp_get(*args, **kwargs):
-    async with aiohttp.ClientSession() as session:
-        async with session.get(*args, **kwargs) as response:
-            return await response.text()
+    async with get_session().get(*args, **kwargs) as response:
+        return await response.text()
 
 def aio_to_sync(func):
     @wraps(func)
@@ -2,27 +2,36 @@
 from random import choice
 from time import time
 from copy import deepcopy
+from re import findall
 from pytz import timezone
 from datetime import datetime
 from urllib.parse import unquote, quote
 from requests import utils as rutils
-from aiofiles.os import path as aiopath, remove as aioremove, listdir, makedirs
-from os import walk, path as ospath
+from aiofiles.os import path as aiopath, remove as aioremove, listdir
 from html import escape
-from aioshutil import move
-from asyncio import create_subprocess_exec, sleep, Event
+from mimetypes import guess_type
+from asyncio import create_subprocess_exec, sleep, Event, Semaphore, gather
+from asyncio.subprocess import PIPE
 from pyrogram.enums import ChatType
 
 from bot import OWNER_ID, Interval, aria2, DOWNLOAD_DIR, download_dict, download_dict_lock, LOGGER, bot_name, DATABASE_URL, \
     MAX_SPLIT_SIZE, config_dict, status_reply_dict_lock, user_data, non_queued_up, non_queued_dl, queued_up, \
     queued_dl, queue_dict_lock, bot, GLOBAL_EXTENSION_FILTER
 from bot.helper.ext_utils.bot_utils import extra_btns, sync_to_async, get_readable_file_size, get_readable_time, is_mega_link, is_gdrive_link
-from bot.helper.ext_utils.fs_utils import get_base_name, get_path_size, clean_download, clean_target, \
-    is_first_archive_split, is_archive, is_archive_split, join_files
-from bot.helper.ext_utils.leech_utils import split_file, format_filename
+from bot.helper.ext_utils.fs_utils import get_base_name, clean_download, clean_target, \
+    join_files, get_archive_sets, link_tree, check_storage_threshold
+from bot.helper.ext_utils.leech_utils import split_file, format_filename, is_virtual_splittable, plan_virtual_split
 from bot.helper.ext_utils.exceptions import NotSupportedExtractionArchive
 from bot.helper.ext_utils.task_manager import start_from_queued
+from bot.helper.ext_utils.cpu_executor import cpu_executor, CpuSlotCancelled
+from bot.helper.ext_utils.bandwidth import bandwidth_limiter
+from bot.helper.ext_utils.task_manifest import TaskManifest
+from bot.helper.ext_utils.archive_probe import probe_archive, forget_probes
+from bot.helper.ext_utils.same_dir import same_dir_barrier, merge_folder
+from bot.helper.ext_utils.stream_archive import stream_archive, rclone_rcat, CancelledArchive
+from bot.helper.ext_utils.zip_profiles import ZIP_PROFILES, PROFILE_EXTENSIONS, get_zip_profile, estimate_ratio, profile_settings, profile_threads
 from bot.helper.mirror_utils.status_utils.extract_status import ExtractStatus
+from bot.helper.mirror_utils.status_utils.join_status import JoinStatus
 from bot.helper.mirror_utils.status_utils.zip_status import ZipStatus
 from bot.helper.mirror_utils.status_utils.split_status import SplitStatus
 from bot.helper.mirror_utils.status_utils.gdrive_status import GdriveStatus
@@ -40,6 +49,25 @@ from bot.helper.ext_utils.db_handler import DbManger
 from bot.helper.themes import BotTheme
 
 
+class SubprocessGroup:
+    """Stands in for ``suproc`` while several 7z children of one task run at once."""
+
+    def __init__(self):
+        self.__procs = set()
+        self.returncode = None
+
+    def add(self, proc):
+        self.__procs.add(proc)
+        if self.returncode == -9:
+            proc.kill()
+
+    def kill(self):
+        self.returncode = -9
+        for proc in self.__procs:
+            if proc.returncode is None:
+                proc.kill()
+
+
 class MirrorLeechListener:
     def __init__(self, message, compress=False, extract=False, isQbit=False, isLeech=False, tag=None, select=False, seed=False, sameDir=None, rcFlags=None, upPath=None, isClone=False, 
                 join=False, drive_id=None, index_link=None, isYtdlp=False, source_url=None, logMessage=None, leech_utils={}):
@@ -67,6 +95,11 @@ class MirrorLeechListener:
         self.user_dict = user_data.get(self.user_id, {})
         self.isPM = config_dict['BOT_PM'] or self.user_dict.get('bot_pm')
         self.suproc = None
+        self.manifest = None
+        self.virtual_splits = {}
+        # Uploaders that take volumes while the archive is still being written set this
+        self.archive_volume_handler = None
+        self.zip_stats = None
         self.sameDir = sameDir
         self.rcFlags = rcFlags
         self.upPath = upPath
@@ -101,6 +134,52 @@ class MirrorLeechListener:
         except Exception:
             pass
 
+    async def __run_7z(self, cmd, status=None, report=None):
+        try:
+            async with cpu_executor.slot(self, status):
+                if self.suproc == 'cancelled' or self.suproc is not None and self.suproc.returncode == -9:
+                    return -9
+                # -bsp1 streams "NN%" progress to stdout, -bso0 drops the file listing
+                proc = await create_subprocess_exec(*cmd, '-bsp1', '-bso0', stdout=PIPE)
+                if isinstance(self.suproc, SubprocessGroup):
+                    self.suproc.add(proc)
+                else:
+                    self.suproc = proc
+                tail = ''
+                while chunk := await proc.stdout.read(512):
+                    tail = (tail + chunk.decode(errors='ignore'))[-32:]
+                    if report is not None and (percents := findall(r'(\d+)%', tail)):
+                        report(int(percents[-1]))
+                return await proc.wait()
+        except CpuSlotCancelled:
+            return -9
+
+    async def __on_archive_volume(self, volume):
+        if self.archive_volume_handler is not None:
+            await self.archive_volume_handler(volume)
+        else:
+            self.manifest.add(volume, await aiopath.getsize(volume))
+
+    def __rclone_target(self, up_name):
+        """Remote path ``up_name`` goes to and the rclone config to use, following the upPath conventions."""
+        rc_path = config_dict['RCLONE_PATH'] if self.upPath == 'rc' else self.upPath
+        config_path = 'rclone.conf'
+        if rc_path.startswith('mrcc:'):
+            rc_path = rc_path.split('mrcc:', 1)[1]
+            config_path = f'rclone/{self.user_id}.conf'
+        rc_path = rc_path if rc_path.endswith(':') else f"{rc_path.rstrip('/')}/"
+        return f'{rc_path}{up_name}', config_path
+
+    def __rclone_flags(self):
+        flags = []
+        for flag in (self.rcFlags or '').split('|'):
+            if ':' in flag:
+                key, value = map(str.strip, flag.split(':', 1))
+                flags.extend((key, value))
+            elif flag.strip():
+                flags.append(flag.strip())
+        return flags
+
     def __setModeEng(self):
         mode = f" #{'Leech' if self.isLeech else 'Clone' if self.isClone else 'RClone' if self.upPath not in ['gd', 'ddl'] else 'DDL' if self.upPath != 'gd' else 'GDrive'}"
         mode += ' (Zip)' if self.compress else ' (Unzip)' if self.extract else ''
@@ -138,6 +217,8 @@ class MirrorLeechListener:
             self.source_msg = f"<code>{self.source_url}</code>"
         
     async def onDownloadStart(self):
+        if self.sameDir:
+            await same_dir_barrier(self.sameDir).add(self.uid)
         if config_dict['LINKS_LOG_ID'] and not self.excep_chat:
             dispTime = datetime.now(timezone(config_dict['TIMEZONE'])).strftime('%d/%m/%y, %I:%M:%S %p')
             self.linkslogmsg = await sendCustomMsg(config_dict['LINKS_LOG_ID'], BotTheme('LINKS_START', Mode=self.upload_details['mode'], Tag=self.tag) + BotTheme('LINKS_SOURCE', On=dispTime, Source=self.source_msg))
@@ -148,29 +229,15 @@ class MirrorLeechListener:
 
     async def onDownloadComplete(self):
         multi_links = False
-        while True:
-            if self.sameDir:
-                if self.sameDir['total'] in [1, 0] or self.sameDir['total'] > 1 and len(self.sameDir['tasks']) > 1:
-                    break
-            else:
-                break
-            await sleep(0.2)
+        if self.sameDir:
+            await same_dir_barrier(self.sameDir).wait()
         async with download_dict_lock:
             if self.sameDir and self.sameDir['total'] > 1:
-                self.sameDir['tasks'].remove(self.uid)
-                self.sameDir['total'] -= 1
+                await same_dir_barrier(self.sameDir).remove(self.uid)
                 folder_name = self.sameDir['name']
                 spath = f"{self.dir}/{folder_name}"
                 des_path = f"{DOWNLOAD_DIR}{list(self.sameDir['tasks'])[0]}/{folder_name}"
-                await makedirs(des_path, exist_ok=True)
-                for item in await listdir(spath):
-                    if item.endswith(('.aria2', '.!qB')):
-                        continue
-                    item_path = f"{self.dir}/{folder_name}/{item}"
-                    if item in await listdir(des_path):
-                        await move(item_path, f'{des_path}/{self.uid}-{item}')
-                    else:
-                        await move(item_path, f'{des_path}/{item}')
+                await sync_to_async(merge_folder, spath, des_path, self.uid)
                 multi_links = True
             download = download_dict[self.uid]
             name = str(download.name()).replace('/', '')
@@ -191,7 +258,8 @@ class MirrorLeechListener:
 
         dl_path = f"{self.dir}/{name}"
         up_path = ''
-        size = await get_path_size(dl_path)
+        self.manifest = await TaskManifest.build(dl_path)
+        size = self.manifest.size()
         async with queue_dict_lock:
             if self.uid in non_queued_dl:
                 non_queued_dl.remove(self.uid)
@@ -199,71 +267,123 @@ class MirrorLeechListener:
         user_dict = user_data.get(self.message.from_user.id, {})
         
         if self.join and await aiopath.isdir(dl_path):
-            await join_files(dl_path)
+            join_status = JoinStatus(name, size, gid, self)
+            async with download_dict_lock:
+                download_dict[self.uid] = join_status
+            await join_files(dl_path, join_status, lambda: self.suproc == 'cancelled', config_dict.get('EXTRACT_PARALLEL') or 3)
+            if self.suproc == 'cancelled':
+                return
+            await self.manifest.rescan(dl_path)
 
         if self.extract:
             pswd = self.extract if isinstance(self.extract, str) else ''
+            # Filtered members are never written, instead of being extracted and deleted before upload
+            excluded_exts = {*GLOBAL_EXTENSION_FILTER, *user_dict.get('excluded_exts', [])}
+            excludes = [f'-xr!*.{ext}' for ext in excluded_exts]
             try:
                 if await aiopath.isfile(dl_path):
                     up_path = get_base_name(dl_path)
                 LOGGER.info(f"Extracting: {name}")
+                if is_dir := await aiopath.isdir(dl_path):
+                    archive_sets = await sync_to_async(get_archive_sets, dl_path)
+                else:
+                    archive_sets = [(self.dir, dl_path, [(dl_path, size)])]
+                probes = await gather(*(probe_archive(f_path, pswd, members) for _, f_path, members in archive_sets))
+                if any(probe.encrypted and not probe.valid for probe in probes):
+                    await self.onUploadError('Wrong password for the archive!' if pswd else
+                                             'Archive is password protected, send the task again with the password after -e!')
+                    return
+                if not is_dir and not probes[0].valid:
+                    raise NotSupportedExtractionArchive
+                if not pswd and any(probe.encrypted for probe in probes):
+                    await self.onUploadError('Archive content is password protected, send the task again with the password after -e!')
+                    return
+                # Sets 7z can't open are left as plain files
+                spans = {f_path: probe.size(excluded_exts) for (_, f_path, _), probe in zip(archive_sets, probes) if probe.valid}
+                archive_sets = [archive_set for archive_set in archive_sets if archive_set[1] in spans]
+                out_size = sum(spans.values())
+                if (threshold := config_dict['STORAGE_THRESHOLD']) and not await sync_to_async(check_storage_threshold, out_size, threshold * 1024**3):
+                    await self.onUploadError(f'Not enough free space to extract {get_readable_file_size(out_size)}, '
+                                             f'you must leave {threshold}GB free storage.')
+                    return
+                extract_status = ExtractStatus(name, out_size or size, gid, self)
                 async with download_dict_lock:
-                    download_dict[self.uid] = ExtractStatus(
-                        name, size, gid, self)
-                if await aiopath.isdir(dl_path):
+                    download_dict[self.uid] = extract_status
+                if is_dir:
                     if self.seed:
                         self.newDir = f"{self.dir}10000"
                         up_path = f"{self.newDir}/{name}"
                     else:
                         up_path = dl_path
-                    for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
-                        for file_ in files:
-                            if is_first_archive_split(file_) or is_archive(file_) and not file_.endswith('.rar'):
-                                f_path = ospath.join(dirpath, file_)
-                                t_path = dirpath.replace(
-                                    self.dir, self.newDir) if self.seed else dirpath
-                                cmd = [
-                                    "7z", "x", f"-p{pswd}", f_path, f"-o{t_path}", "-aot", "-xr!@PaxHeader"]
-                                if not pswd:
-                                    del cmd[2]
-                                if self.suproc == 'cancelled' or self.suproc is not None and self.suproc.returncode == -9:
-                                    return
-                                self.suproc = await create_subprocess_exec(*cmd)
-                                code = await self.suproc.wait()
-                                if code == -9:
-                                    return
-                                elif code != 0:
-                                    LOGGER.error(
-                                        'Unable to extract archive splits!')
-                        if not self.seed and self.suproc is not None and self.suproc.returncode == 0:
-                            for file_ in files:
-                                if is_archive_split(file_) or is_archive(file_):
-                                    del_path = ospath.join(dirpath, file_)
-                                    try:
-                                        await aioremove(del_path)
-                                    except:
-                                        return
+                    if self.suproc == 'cancelled':
+                        return
+                    # Every child 7z registers here, so one kill() stops the whole extraction
+                    self.suproc = SubprocessGroup()
+                    limit = Semaphore(config_dict.get('EXTRACT_PARALLEL') or 3)
+                    progress = {}
+
+                    async def extract_set(dirpath, f_path, members):
+                        t_path = dirpath.replace(self.dir, self.newDir) if self.seed else dirpath
+                        cmd = ["7z", "x", f"-p{pswd}", f_path, f"-o{t_path}", "-aot", "-xr!@PaxHeader", *excludes]
+                        if not pswd:
+                            del cmd[2]
+                        span = spans[f_path]
+
+                        def report(percent):
+                            progress[f_path] = span * percent // 100
+                            extract_status.update_progress(sum(progress.values()))
+
+                        async with limit:
+                            if self.suproc == 'cancelled' or self.suproc.returncode == -9:
+                                return -9
+                            code = await self.__run_7z(cmd, extract_status, report)
+                        if code == 0:
+                            forget_probes([f_path])
+                        if code == 0 and not self.seed:
+                            for m_path, _ in members:
+                                try:
+                                    await aioremove(m_path)
+                                except:
+                                    pass
+                            self.manifest.forget(*(m_path for m_path, _ in members))
+                        elif code not in (0, -9):
+                            LOGGER.error(f'Unable to extract archive splits: {f_path}')
+                        return code
+
+                    codes = await gather(*(extract_set(*archive_set) for archive_set in archive_sets))
+                    if -9 in codes or self.suproc.returncode == -9:
+                        return
+                    if self.seed:
+                        # Everything but the volumes of extracted sets goes to the upload tree as hardlinks,
+                        # sets that failed to extract are uploaded as they are
+                        members = {m_path for (_, _, set_members), code in zip(archive_sets, codes) if code == 0
+                                   for m_path, _ in set_members}
+                        await sync_to_async(link_tree, dl_path, up_path, members)
+                    await self.manifest.rescan(up_path)
                 else:
                     if self.seed:
                         self.newDir = f"{self.dir}10000"
                         up_path = up_path.replace(self.dir, self.newDir)
                     cmd = ["7z", "x", f"-p{pswd}", dl_path,
-                           f"-o{up_path}", "-aot", "-xr!@PaxHeader"]
+                           f"-o{up_path}", "-aot", "-xr!@PaxHeader", *excludes]
                     if not pswd:
                         del cmd[2]
                     if self.suproc == 'cancelled':
                         return
-                    self.suproc = await create_subprocess_exec(*cmd)
-                    code = await self.suproc.wait()
+                    span = spans[dl_path]
+                    code = await self.__run_7z(cmd, extract_status, lambda percent: extract_status.update_progress(span * percent // 100))
                     if code == -9:
                         return
                     elif code == 0:
                         LOGGER.info(f"Extracted Path: {up_path}")
+                        forget_probes([dl_path])
+                        await self.manifest.rescan(up_path)
                         if not self.seed:
                             try:
                                 await aioremove(dl_path)
                             except:
                                 return
+                            self.manifest.forget(dl_path)
                     else:
                         LOGGER.error(
                             'Unable to extract archive! Uploading anyway')
@@ -274,47 +394,96 @@ class MirrorLeechListener:
                 self.newDir = ""
                 up_path = dl_path
 
+        tg = None
         if self.compress:
             pswd = self.compress if isinstance(self.compress, str) else ''
+            profile = get_zip_profile(user_dict, self.leech_utils.get('zip_profile'))
+            fmt, level = profile_settings(profile, pswd)
+            label = profile if fmt == ZIP_PROFILES[profile][0] else f'{profile} (7z)'
+            ext = PROFILE_EXTENSIONS[fmt]
             if up_path:
                 dl_path = up_path
-                up_path = f"{up_path}.zip"
+                up_path = f"{up_path}.{ext}"
             elif self.seed and self.isLeech:
                 self.newDir = f"{self.dir}10000"
-                up_path = f"{self.newDir}/{name}.zip"
+                up_path = f"{self.newDir}/{name}.{ext}"
             else:
-                up_path = f"{dl_path}.zip"
+                up_path = f"{dl_path}.{ext}"
+            zip_status = ZipStatus(name, size, gid, self)
             async with download_dict_lock:
-                download_dict[self.uid] = ZipStatus(name, size, gid, self)
+                download_dict[self.uid] = zip_status
             LEECH_SPLIT_SIZE = user_dict.get('split_size', False) or config_dict['LEECH_SPLIT_SIZE']
-            cmd = ["7z", f"-v{LEECH_SPLIT_SIZE}b", "a",
-                   "-mx=0", f"-p{pswd}", up_path, dl_path]
-            for ext in GLOBAL_EXTENSION_FILTER:
-                ex_ext = f'-xr!*.{ext}'
-                cmd.append(ex_ext)
-            if self.isLeech and int(size) > LEECH_SPLIT_SIZE:
-                if not pswd:
-                    del cmd[4]
-                LOGGER.info(f'Zip: orig_path: {dl_path}, zip_path: {up_path}.0*')
-            else:
-                del cmd[1]
-                if not pswd:
-                    del cmd[3]
-                LOGGER.info(f'Zip: orig_path: {dl_path}, zip_path: {up_path}')
+            volume_size = LEECH_SPLIT_SIZE if self.isLeech and int(size) > LEECH_SPLIT_SIZE else 0
+            estimate = await estimate_ratio(dl_path, profile, pswd)
+            LOGGER.info(f'Zip ({label}): orig_path: {dl_path}, zip_path: {up_path}{".0*" if volume_size else ""}')
+            # Streamed uploads start during the zip, before the upload queue, so they are off while one is set
+            stream_up = not (pswd or fmt == '7z' or config_dict['QUEUE_UPLOAD'] or config_dict['QUEUE_ALL'])
+            rcat = stream_up and not self.isLeech and not self.isClone and self.upPath not in ['gd', 'ddl']
+            if rcat:
+                remote_path, config_path = self.__rclone_target(up_path.rsplit('/', 1)[1])
+            elif self.isLeech and stream_up:
+                # Registers itself as the volume handler, each volume is sent while the next one is written
+                tg = TgUploader(up_path.rsplit('/', 1)[1], up_path.rsplit('/', 1)[0], self)
             if self.suproc == 'cancelled':
                 return
-            self.suproc = await create_subprocess_exec(*cmd)
-            code = await self.suproc.wait()
+            start = time()
+            if pswd or fmt == '7z':
+                cmd = ["7z", f"-v{LEECH_SPLIT_SIZE}b" if volume_size else None, "a", f"-t{'7z' if fmt == '7z' else 'zip'}",
+                       f"-mx={level}", f"-mmt={profile_threads()}", f"-p{pswd}" if pswd else None, up_path, dl_path]
+                cmd = [arg for arg in cmd if arg is not None]
+                for f_ext in GLOBAL_EXTENSION_FILTER:
+                    cmd.append(f'-xr!*.{f_ext}')
+                code = await self.__run_7z(cmd, zip_status, lambda percent: zip_status.update_progress(size * percent // 100))
+            else:
+                is_cancelled = lambda: self.suproc == 'cancelled' or self.suproc is not None and self.suproc.returncode == -9
+                try:
+                    async with cpu_executor.slot(self, zip_status):
+                        if is_cancelled():
+                            raise CancelledArchive
+                        if rcat:
+                            # Piped into rclone rcat, the archive never touches the disk
+                            flags = ['--config', config_path, *bandwidth_limiter.rclone_flags(self.user_id), *self.__rclone_flags()]
+                            code, packed = await rclone_rcat(dl_path, remote_path, fmt, flags, zip_status, is_cancelled, level)
+                        else:
+                            # Archive written by a streaming archiver, volumes are handed over as they close
+                            packed = await stream_archive(dl_path, up_path, volume_size, self.__on_archive_volume, fmt,
+                                                          zip_status, is_cancelled, level)
+                            code = 0
+                except (CancelledArchive, CpuSlotCancelled):
+                    code = -9
+                except Exception as e:
+                    LOGGER.error(f'Streaming zip failed: {e}')
+                    if tg is not None:
+                        await tg.abort()
+                    await self.onUploadError(f'Zip failed: {e}')
+                    return
             if code == -9:
+                if tg is not None:
+                    await tg.abort()
+                return
+            elif rcat and code != 0:
+                await self.onUploadError(f'rclone rcat exited with {code}')
                 return
             elif not self.seed:
                 await clean_target(dl_path)
+                self.manifest.forget(dl_path)
+            if rcat:
+                self.zip_stats = (label, estimate, packed / size if size else 1.0, size / max(time() - start, 0.001))
+                up_name = up_path.rsplit('/', 1)[1]
+                await self.onUploadComplete(None, packed, 1, 0, guess_type(up_name)[0] or 'application/octet-stream', up_name,
+                                            rclonePath=remote_path)
+                return
+            if pswd or fmt == '7z':
+                await self.manifest.rescan_outputs(up_path)
+                packed = sum(entry.size for _, entry in self.manifest.outputs(up_path))
+            if code == 0:
+                self.zip_stats = (label, estimate, packed / size if size else 1.0, size / max(time() - start, 0.001))
 
         if not self.compress and not self.extract:
             up_path = dl_path
 
         up_dir, up_name = up_path.rsplit('/', 1)
-        size = await get_path_size(up_dir)
+        size = self.manifest.size(up_dir)
         if self.isLeech:
             m_size = []
             o_files = []
@@ -322,35 +491,59 @@ class MirrorLeechListener:
                 checked = False
                 LEECH_SPLIT_SIZE = user_dict.get(
                     'split_size', False) or config_dict['LEECH_SPLIT_SIZE']
-                for dirpath, _, files in await sync_to_async(walk, up_dir, topdown=False):
-                    for file_ in files:
-                        f_path = ospath.join(dirpath, file_)
-                        f_size = await aiopath.getsize(f_path)
-                        if f_size > LEECH_SPLIT_SIZE:
-                            if not checked:
-                                checked = True
-                                async with download_dict_lock:
-                                    download_dict[self.uid] = SplitStatus(
-                                        up_name, size, gid, self)
-                                LOGGER.info(f"Splitting: {up_name}")
-                            res = await split_file(f_path, f_size, file_, dirpath, LEECH_SPLIT_SIZE, self)
-                            if not res:
-                                return
-                            if res == "errored":
-                                if f_size <= MAX_SPLIT_SIZE:
-                                    continue
-                                try:
-                                    await aioremove(f_path)
-                                except:
+                equal_splits = user_dict.get('equal_splits', False) or ('equal_splits' not in user_dict and config_dict['EQUAL_SPLITS'])
+                # Non-media files are uploaded as byte ranges of the original, only media is cut by ffmpeg
+                virtual = {f_path: await sync_to_async(is_virtual_splittable, f_path)
+                           for f_path, entry in self.manifest.files(up_dir) if entry.size > LEECH_SPLIT_SIZE}
+                if self.seed and not self.newDir and not all(virtual.values()):
+                    # Split a hardlinked copy so the seeded files stay untouched. Media is still cut by ffmpeg,
+                    # its parts take disk space next to the seeded original, everything else is split virtually
+                    self.newDir = f"{self.dir}10000"
+                    linked = await sync_to_async(link_tree, up_path, f"{self.newDir}/{up_name}")
+                    virtual = {f_path.replace(up_dir, self.newDir, 1): value for f_path, value in virtual.items()}
+                    up_dir, up_path = self.newDir, f"{self.newDir}/{up_name}"
+                    for l_path, l_size in linked:
+                        self.manifest.add(l_path, l_size)
+                for f_path, entry in self.manifest.files(up_dir):
+                    dirpath, file_ = f_path.rsplit('/', 1)
+                    f_size = entry.size
+                    if virtual.get(f_path):
+                        self.virtual_splits[f_path] = plan_virtual_split(f_path, f_size, LEECH_SPLIT_SIZE, equal_splits)
+                    elif f_size > LEECH_SPLIT_SIZE:
+                        if not checked:
+                            checked = True
+                            split_status = SplitStatus(up_name, size, gid, self)
+                            async with download_dict_lock:
+                                download_dict[self.uid] = split_status
+                            LOGGER.info(f"Splitting: {up_name}")
+                        try:
+                            async with cpu_executor.slot(self, split_status):
+                                if self.suproc == 'cancelled':
                                     return
-                            elif not self.seed or self.newDir:
-                                try:
-                                    await aioremove(f_path)
-                                except:
-                                    return
-                            else:
-                                m_size.append(f_size)
-                                o_files.append(file_)
+                                res = await split_file(f_path, f_size, file_, dirpath, LEECH_SPLIT_SIZE, self)
+                        except CpuSlotCancelled:
+                            return
+                        if not res:
+                            return
+                        if res == "errored":
+                            if f_size <= MAX_SPLIT_SIZE:
+                                continue
+                            try:
+                                await aioremove(f_path)
+                            except:
+                                return
+                            self.manifest.forget(f_path)
+                        elif not self.seed or self.newDir:
+                            try:
+                                await aioremove(f_path)
+                            except:
+                                return
+                            self.manifest.forget(f_path)
+                        else:
+                            m_size.append(f_size)
+                            o_files.append(file_)
+                if checked:
+                    await self.manifest.rescan(up_dir)
 
         up_limit = config_dict['QUEUE_UPLOAD']
         all_limit = config_dict['QUEUE_ALL']
@@ -369,17 +562,24 @@ class MirrorLeechListener:
                     name, size, gid, self, 'Up')
             await event.wait()
             async with download_dict_lock:
-                if self.uid not in download_dict:
-                    return
+                cancelled = self.uid not in download_dict
+            if cancelled:
+                if tg is not None:
+                    await tg.abort()
+                return
             LOGGER.info(f'Start from Queued/Upload: {name}')
         async with queue_dict_lock:
             non_queued_up.add(self.uid)
         if self.isLeech:
-            size = await get_path_size(up_dir)
+            size = self.manifest.size(up_dir)
             for s in m_size:
                 size = size - s
             LOGGER.info(f"Leech Name: {up_name}")
-            tg = TgUploader(up_name, up_dir, self)
+            if tg is None:
+                tg = TgUploader(up_name, up_dir, self)
+            else:
+                # Volumes sent during the zip are no longer on disk
+                size += tg.streamed_size
             tg_upload_status = TelegramStatus(
                 tg, size, self.message, gid, 'up', self.upload_details)
             async with download_dict_lock:
@@ -387,7 +587,7 @@ class MirrorLeechListener:
             await update_all_messages()
             await tg.upload(o_files, m_size, size)
         elif self.upPath == 'gd':
-            size = await get_path_size(up_path)
+            size = self.manifest.size(up_path)
             LOGGER.info(f"Upload Name: {up_name}")
             drive = GoogleDriveHelper(up_name, up_dir, self)
             upload_status = GdriveStatus(drive, size, self.message, gid, 'up', self.upload_details)
@@ -397,7 +597,7 @@ class MirrorLeechListener:
 
             await sync_to_async(drive.upload, up_name, size, self.drive_id)
         elif self.upPath == 'ddl':
-            size = await get_path_size(up_path)
+            size = self.manifest.size(up_path)
             LOGGER.info(f"Upload Name: {up_name} via DDL")
             ddl = DDLUploader(self, up_name, up_dir)
             ddl_upload_status = DDLStatus(ddl, size, self.message, gid, self.upload_details)
@@ -406,7 +606,7 @@ class MirrorLeechListener:
             await update_all_messages()
             await ddl.upload(up_name, size)
         else:
-            size = await get_path_size(up_path)
+            size = self.manifest.size(up_path)
             LOGGER.info(f"Upload Name: {up_name} via RClone")
             RCTransfer = RcloneTransferHelper(self, up_name)
             async with download_dict_lock:
@@ -425,6 +625,10 @@ class MirrorLeechListener:
         msg += BotTheme('SIZE', Size=get_readable_file_size(size))
         msg += BotTheme('ELAPSE', Time=get_readable_time(time() - self.message.date.timestamp()))
         msg += BotTheme('MODE', Mode=self.upload_details['mode'])
+        if self.zip_stats:
+            profile, estimate, ratio, throughput = self.zip_stats
+            msg += BotTheme('ZIP_STATS', Profile=profile, Estimate=f'{estimate:.0%}', Ratio=f'{ratio:.0%}',
+                            Speed=f'{get_readable_file_size(throughput)}/s')
         LOGGER.info(f'Task Done: {name}')
         
         buttons = ButtonMaker()
@@ -614,9 +818,8 @@ class MirrorLeechListener:
             if self.uid in download_dict.keys():
                 del download_dict[self.uid]
             count = len(download_dict)
-            if self.sameDir and self.uid in self.sameDir['tasks']:
-                self.sameDir['tasks'].remove(self.uid)
-                self.sameDir['total'] -= 1
+            if self.sameDir:
+                await same_dir_barrier(self.sameDir).remove(self.uid)
         msg = f'''<i><b>Download Stopped!</b></i>
 ┠ <b>Task for:</b> {self.tag}
 ┃
@@ -6,15 +6,15 @@ from typing import Dict, Any, Union, Optional
 
 import aiofiles.os
 from aiofiles.os import remove as aioremove, path as aiopath
-from bot.helper.ext_utils.bot_utils import bt_selection_buttons, sync_to_async
+from aria2p import Download
+from bot import aria2
+from bot.helper.ext_utils.aria2_rpc import aria2_ws, Aria2RpcError
+from bot.helper.ext_utils.bot_utils import bt_selection_buttons
 from bot.helper.mirror_utils.status_utils.aria2_status import Aria2Status
 from bot.helper.telegram_helper.message_utils import sendStatusMessage, sendMessage
 from bot.helper.ext_utils.task_manager import is_queued
 from bot.config import TORRENT_TIMEOUT
 
-import aioaria2c
-from aioaria2c.aioaria2c import Aria2c
-
 async def add_aria2c_download(
     link: str,  # The download link
     path: str,  # The path to save the download
@@ -25,7 +25,9 @@ async def add_aria2c_download(
     seed_time: Optional[int] = None  # Optional seed time
 ) -> None:
     """
-    Add a download to Aria2 using aria2c with the given parameters.
+    Add a download to Aria2 with the given parameters.
+    The download is added over the shared aria2 WebSocket connection that also
+    delivers the completion notifications to aria2_listener.
     """
     a2c_opt = {**aria2_options}  # Copy aria2_options to a2c_opt
     [a2c_opt.pop(k) for k in aria2c_global if k in aria2_options]  # Remove aria2c_global keys from a2c_opt
@@ -49,10 +51,9 @@ async def add_aria2c_download(
             a2c_opt["pause"] = "true"
 
     try:
-        aria2 = Aria2c()  # Initialize Aria2c
-        await aria2.start()  # Start Aria2c
-        download = await aria2.add_download(link, **a2c_opt)  # Add download with given parameters
-    except aioaria2c.exceptions.Aria2cException as e:
+        gid = await aria2_ws.add_download(link, a2c_opt)  # Add through the shared aria2 WebSocket
+        download = Download(aria2, await aria2_ws.tell_status(gid))
+    except Aria2RpcError as e:
         LOGGER.debug(f"Aria2c Download Error: {e}")
         await sendMessage(listener.message, f"{e}")
         return
@@ -60,8 +61,6 @@ async def add_aria2c_download(
         LOGGER.debug(f"Aria2c Download Error: {e}")
         await sendMessage(listener.message, f"Unexpected error: {e}")
         return
-    finally:
-        await aria2.stop()  # Stop Aria2c
 
     if await aiopath.exists(link):
         await aioremove(link)  # Remove the link if it exists
@@ -92,7 +91,7 @@ async def add_aria2c_download(
         await sendStatusMessage(listener.message)
     elif listener.select and download.is_torrent and not download.is_metadata:
         if not added_to_queue:
-            await sync_to_async(aria2.client.force_pause, gid)
+            await aria2_ws.force_pause(gid)
         buttons = bt_selection_buttons(gid)
         msg = "Your download paused. Choose files then press Done Selecting button to start downloading."
         await sendMessage(listener.message, msg, buttons)
@@ -107,12 +106,8 @@ async def add_aria2c_download(
             download.queued = False
             new_gid = download.gid()
 
-        await sync_to_async(aria2.client.unpause, new_gid)
+        await aria2_ws.unpause(new_gid)
         LOGGER.debug(f'Start Queued Download from Aria2c: {name}. Gid: {gid}')
 
         async with queue_dict_lock:
             non_queued_dl.add(listener.uid)
-
-
-# Install aioaria2c package as a separate step
-install_command = "pip install aioaria2c"
@@ -3,6 +3,8 @@ import os
 import logging
 from yt_dlp import YoutubeDL, DownloadError
 
+from bot.helper.ext_utils.speed_estimator import SpeedEstimator
+
 class YoutubeDLHelper(YoutubeDL):
     def __init__(self, listener):
         super().__init__()
@@ -12,6 +14,7 @@ class YoutubeDLHelper(YoutubeDL):
         self.__downloaded_bytes: int = 0
         self.__download_speed: int = 0
         self.__eta: Union[str, float] = '-'
+        self.__speed = SpeedEstimator()
         self.__listener = listener
         self.__gid: str = ''
         self.__is_cancelled: bool = False
@@ -111,8 +114,9 @@ class YoutubeDLHelper(YoutubeDL):
             if self.__size > 0:
                 self.__downloaded_bytes = d['downloaded_bytes']
                 self.__progress = self.__downloaded_bytes / self.__size
-                self.__download_speed = d['speed']
-                self.__eta = d['eta']
+                self.__download_speed = self.__speed.update(self.__downloaded_bytes)
+                eta = self.__speed.eta(self.__size, self.__downloaded_bytes)
+                self.__eta = '-' if eta is None else eta
         elif d['status'] == 'finished':
             self.__downloading = False
             self.__gid = d['id']
@@ -122,6 +126,7 @@ class YoutubeDLHelper(YoutubeDL):
             self.__progress = 0
             self.__download_speed = 0
             self.__eta = '-'
+            self.__speed.reset()
             self.__update_name(d)
         elif d['status'] == 'failed':
             self.__downloading = False
@@ -131,6 +136,7 @@ class YoutubeDLHelper(YoutubeDL):
             self.__progress = 0
             self.__download_speed = 0
             self.__eta = '-'
+            self.__speed.reset()
             self.__update_name(d)
 
     @staticmethod
@@ -1,48 +1,23 @@
 import asyncio
 import datetime
-from typing import Any, Callable, Dict, List, Optional
+from time import time
+from typing import Optional
 
-import aioaria2rpc
-from bot import aria2, logger
+from aria2p import Download
 from bot.helper.ext_utils.bot_utils import EngineStatus, MirrorStatus, get_readable_time
+from bot.helper.ext_utils.engine_snapshot import engine_snapshot
 
-def memoized(maxsize=128):
-    """
-    A decorator for memoizing the results of a function.
-    This decorator stores the results of the function in a cache dictionary,
-    and returns the cached result if the function has already been called
-    with the same arguments. This can improve performance for functions
-    that are called multiple times with the same arguments.
-    """
-    cache: Dict[str, Any] = {}
-
-    def decorator(func: Callable) -> Callable:
-        async def wrapper(*args: List[Any], **kwargs: Dict[str, Any]) -> Any:
-            key = str(args) + str(kwargs)
-            if key not in cache:
-                cache[key] = await func(*args, **kwargs)
-            return cache[key]
-
-        return wrapper
-
-    return decorator
-
-@memoized
-async def get_download_by_gid(gid: str) -> Optional[aioaria2rpc.Download]:
+def get_download_by_gid(gid: str) -> Optional[Download]:
     """
     Get the download object by GID.
-    This function sends an RPC request to the Aria2 instance to get the download
-    object with the given GID. If the RPC request fails, an error message is
-    logged and None is returned.
+    This function reads the download from the per-tick engine snapshot, which
+    fetches every aria2 download in one bulk RPC call instead of one request
+    per status object.
 
     :param gid: The GID of the download.
-    :return: The download object, or None if the RPC request fails.
+    :return: The download object, or None if it is not in the last snapshot.
     """
-    try:
-        return await aria2.get_download(gid)
-    except aioaria2rpc.RPCError as e:
-        logger.error(f'{e}: Aria2c, Error while getting torrent info')
-        return None
+    return engine_snapshot.aria2_download(gid)
 
 class Aria2Status:
     """
@@ -52,7 +27,7 @@ class Aria2Status:
     """
 
     __slots__ = (
-        '__gid', '__download', '__listener', 'upload_details', 'queued', 'start_time', 'seeding', 'message'
+        '__gid', '__added', '__download', '__listener', 'upload_details', 'queued', 'start_time', 'seeding', 'message'
     )
 
     def __init__(self, gid: str, listener=None, seeding: bool = False, queued: bool = False):
@@ -68,6 +43,7 @@ class Aria2Status:
         :param queued: Whether the download is in the queue.
         """
         self.__gid = gid
+        self.__added = time()
         self.__download = None
         self.__listener = listener
         self.upload_details = self.__listener.upload_details if self.__listener else None
@@ -80,23 +56,26 @@ class Aria2Status:
     def __update(self):
         """
         Update the internal state of the object with the latest download info.
-        This method sends an RPC request to the Aria2 instance to get the latest
-        information about the download.
+        This method reads the latest information about the download from the
+        engine snapshot and follows metadata downloads to their real download.
         """
         self.__download = get_download_by_gid(self.__gid)
+        if self.__download is not None and self.__download.followed_by_ids:
+            self.__gid = self.__download.followed_by_ids[0]
+            self.__added = time()
+            self.__download = get_download_by_gid(self.__gid)
 
     @property
     def download(self):
         """
         Get the download object.
         This property returns the download object associated with the GID.
-        If the download object is not available, it sends an RPC request to the
-        Aria2 instance to get the latest information about the download.
+        The object is re-read from the engine snapshot on every access, which
+        is only refreshed by the status tick, so no RPC call is made here.
 
         :return: The download object.
         """
-        if not self.__download:
-            self.__update()
+        self.__update()
         return self.__download
 
     @property
@@ -179,12 +158,13 @@ class Aria2Status:
     def is_removed(self):
         """
         Check if the download has been removed from Aria2.
-        This method returns True if the download object is None,
-        indicating that the download has been removed from Aria2.
+        This method returns True if the download is missing from a snapshot
+        taken after its GID was added. A GID newer than the snapshot is unknown
+        yet, not removed.
 
         :return: True if the download has been removed, False otherwise.
         """
-        return self.__download is None
+        return self.__download is None and engine_snapshot.aria2_taken > self.__added
 
     def progress(self):
         """
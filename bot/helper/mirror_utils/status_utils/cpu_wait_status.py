@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+from time import time
+
+from bot import LOGGER
+from bot.helper.ext_utils.bot_utils import MirrorStatus, get_readable_time
+
+
+class CpuWaitStatus:
+    """Stands in for a zip/extract/split status while its stage waits for a CPU slot."""
+
+    def __init__(self, status, executor):
+        self.__status = status
+        self.__executor = executor
+        self.__start = time()
+
+    def __getattr__(self, attr):
+        return getattr(self.__status, attr)
+
+    def status(self):
+        return MirrorStatus.STATUS_WAITCPU
+
+    def processed_bytes(self):
+        return 0
+
+    def progress(self):
+        return '0%'
+
+    def speed(self):
+        return '0B/s'
+
+    def eta(self):
+        return '-'
+
+    def wait_time(self):
+        return get_readable_time(time() - self.__start)
+
+    def task(self):
+        return self
+
+    async def cancel_download(self):
+        listener = self.__status.listener
+        LOGGER.info(f'Cancelling CPU wait: {listener.uid}')
+        if listener.suproc not in (None, 'cancelled') and listener.suproc.returncode is None:
+            # Sibling archive sets may be running under this group, kill them instead of forgetting them
+            listener.suproc.kill()
+        else:
+            listener.suproc = 'cancelled'
+        self.__executor.cancel(listener.uid)
+        await listener.onUploadError('task has been cancelled while waiting for CPU!')
@@ -1,12 +1,72 @@
-def get_readable_file_size(size: int) -> str:
+#!/usr/bin/env python3
+from bot.helper.ext_utils.bot_utils import EngineStatus, MirrorStatus, get_readable_file_size, get_readable_time
+
+
+class DDLStatus:
     """
-    Returns the size of a file in a human-readable format. This function takes a file size in bytes as input
-    and returns a string representation of the size in a more readable format, such as "10 KB" or "5 MB".
-
-    :param size: The size of the file in bytes. This must be an integer value. The input value should be
-                  accurate and represent the actual size of the file in bytes.
-    :type size: int
-    :return: A string representation of the file size in a human-readable format, such as "10 KB" or "5 MB".
-    :rtype: str
+    Status of a DDLUploader task that may be uploading to several servers at once.
+
+    The task progress follows the slowest server, ``servers()`` lists every
+    destination with its own progress, throughput and link or error.
     """
-    pass
+
+    def __init__(self, obj, size, message, gid, upload_details):
+        self.__obj = obj
+        self.__size = size
+        self.__gid = gid
+        self.upload_details = upload_details
+        self.message = message
+
+    def processed_bytes(self):
+        return get_readable_file_size(self.__obj.processed_bytes)
+
+    def size(self):
+        return get_readable_file_size(self.__size)
+
+    def status(self):
+        return MirrorStatus.STATUS_UPLOADING
+
+    def name(self):
+        return self.__obj.name
+
+    def progress(self):
+        try:
+            progress_raw = self.__obj.processed_bytes / self.__size * 100
+        except ZeroDivisionError:
+            progress_raw = 0
+        return f'{round(progress_raw, 2)}%'
+
+    def speed(self):
+        return f'{get_readable_file_size(self.__obj.speed)}/s'
+
+    def eta(self):
+        # Same smoothed rate as speed(), so the two agree
+        seconds = self.__obj.eta(self.__size)
+        return '-' if seconds is None else get_readable_time(seconds)
+
+    def servers(self):
+        """One line per destination server: sent share and average speed, then its link or error once done."""
+        lines = []
+        throughput = self.__obj.server_throughput()
+        for name, stat in self.__obj.server_stats.items():
+            if stat['error'] is not None:
+                lines.append(f'{name}: Failed, {stat["error"]}')
+                continue
+            try:
+                percent = stat['sent'] / self.__size * 100
+            except ZeroDivisionError:
+                percent = 0
+            line = f'{name}: {round(percent, 2)}% at {get_readable_file_size(throughput[name])}/s'
+            if stat['link']:
+                line += f' | {stat["link"]}'
+            lines.append(line)
+        return '\n'.join(lines)
+
+    def gid(self):
+        return self.__gid
+
+    def download(self):
+        return self.__obj
+
+    def eng(self):
+        return EngineStatus().STATUS_DDL
@@ -8,6 +8,7 @@ from bot.helper.ext_utils.bot_utils import (
     get_readable_file_size,  # Import function to get human-readable file size
     get_readable_time,  # Import function to get human-readable time
 )
+from bot.helper.ext_utils.speed_estimator import SpeedEstimator  # Import the shared speed and ETA estimator
 
 class DirectStatus:
     def __init__(
@@ -30,6 +31,7 @@ class DirectStatus:
         self.file_info = file_info  # Set the file information object
         self.upload_details = upload_details  # Set the upload details
         self.message = listener.message  # Set the message object
+        self.__speed = SpeedEstimator()  # Estimate speed from the processed bytes we observe
 
     @property
     def file_global_id(self) -> str:
@@ -72,7 +74,7 @@ class DirectStatus:
 
         :return: The speed of the file transfer
         """
-        return f"{get_readable_file_size(self.file_info.speed)}/s"
+        return f"{get_readable_file_size(self.__speed.update(self.file_info.processed_bytes))}/s"
 
     @property
     def name(self) -> str:
@@ -99,11 +101,9 @@ class DirectStatus:
 
         :return: The estimated time of arrival
         """
-        try:
-            time_left = (self.file_info.total_size - self.file_info.processed_bytes) / self.file_info.speed
-            return get_readable_time(time_left)
-        except:
-            return "-"
+        self.__speed.update(self.file_info.processed_bytes)
+        time_left = self.__speed.eta(self.file_info.total_size, self.file_info.processed_bytes)
+        return "-" if time_left is None else get_readable_time(time_left)
 
     @property
     def status(self) -> MirrorStatus:
@@ -1,13 +1,32 @@
 #!/usr/bin/env python3
-from pathlib import Path
-from time import time, sleep
-from typing import Optional
-
-def current_time() -> float:
-    """Returns the current time in seconds since the epoch."""
-    return time()
-
-if __name__ == "__main__":
-    while True:
-        print(current_time())
-        sleep(1)
+from bot import LOGGER
+from bot.helper.ext_utils.bot_utils import EngineStatus, MirrorStatus
+from bot.helper.mirror_utils.status_utils.zip_status import ZipStatus
+
+
+class ExtractStatus(ZipStatus):
+    """
+    Status of the extract stage of a MirrorLeechListener task.
+
+    Progress is pushed by the listener from the 7z ``-bsp1`` stream instead of rescanning the output path.
+    """
+    __slots__ = ()
+
+    @property
+    def status(self) -> MirrorStatus:
+        """Get the status of the extraction."""
+        return MirrorStatus.STATUS_EXTRACTING
+
+    @property
+    def eng(self) -> EngineStatus:
+        """Get the engine status of the extraction."""
+        return EngineStatus().STATUS_EXT
+
+    async def cancel_download(self):
+        """Cancel the extraction and log the event."""
+        LOGGER.info(f'Cancelling Extract: {self.name}')
+        if self.listener.suproc is not None:
+            self.listener.suproc.kill()
+        else:
+            self.listener.suproc = 'cancelled'
+        await self.listener.onUploadError('extracting stopped by user!')
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+from bot import LOGGER
+from bot.helper.ext_utils.bot_utils import MirrorStatus
+from bot.helper.mirror_utils.status_utils.extract_status import ExtractStatus
+
+
+class JoinStatus(ExtractStatus):
+    """
+    Status of the join stage that runs before extraction.
+
+    Progress is pushed by the joiner threads as parts are copied into place.
+    """
+    __slots__ = ()
+
+    @property
+    def status(self) -> MirrorStatus:
+        """Get the status of the join."""
+        return MirrorStatus.STATUS_JOINING
+
+    async def cancel_download(self):
+        """Cancel the join, the joiner threads stop at their next chunk."""
+        LOGGER.info(f'Cancelling Join: {self.name}')
+        self.listener.suproc = 'cancelled'
+        await self.listener.onUploadError('joining stopped by user!')
@@ -3,6 +3,7 @@ from typing import Optional, Type, Union
 
 from bot import LOGGER, get_client, QbTorrents
 from bot.helper.ext_utils.bot_utils import EngineStatus, MirrorStatus, get_readable_file_size, get_readable_time
+from bot.helper.ext_utils.engine_snapshot import engine_snapshot
 from bot.qbittorrentclient import QbittorrentClient
 
 class QbittorrentStatus:
@@ -43,7 +44,7 @@ class QbittorrentStatus:
         """
         Update the __info variable after the object is initialized.
         """
-        self.__info = self.__client.torrents_info(f'{self.__listener.uid}')
+        self.__info = engine_snapshot.qbit_torrent(tag=f'{self.__listener.uid}')
         self.message = self.__listener.message
 
     async def __del__(self) -> None:
@@ -235,9 +236,10 @@ class QbittorrentStatus:
 
     def __update(self) -> None:
         """
-        Update the info object.
+        Update the info object from the engine snapshot, which fetches all
+        torrents in one bulk call per status tick.
         """
-        new_info = self.__client.torrents_info(f'{self.__listener.uid}')
+        new_info = engine_snapshot.qbit_torrent(tag=f'{self.__listener.uid}')
         if new_info is not None:
             self.__info = new_info
 
@@ -1,5 +1,62 @@
 #!/usr/bin/env python3
 
-import math
 from bot.helper.ext_utils.bot_utils import EngineStatus, MirrorStatus, get_readable_file_size, get_readable_time
 
+
+class TelegramStatus:
+    """
+    Status of a TgUploader task, ``clients()`` shows how the upload pool is loaded.
+    """
+
+    def __init__(self, obj, size, message, gid, status, upload_details):
+        self.__obj = obj
+        self.__size = size
+        self.__gid = gid
+        self.__status = status
+        self.upload_details = upload_details
+        self.message = message
+
+    def processed_bytes(self):
+        return get_readable_file_size(self.__obj.processed_bytes)
+
+    def size(self):
+        return get_readable_file_size(self.__size)
+
+    def status(self):
+        if self.__status == 'up':
+            return MirrorStatus.STATUS_UPLOADING
+        return MirrorStatus.STATUS_DOWNLOADING
+
+    def name(self):
+        return self.__obj.name
+
+    def progress(self):
+        try:
+            progress_raw = self.__obj.processed_bytes / self.__size * 100
+        except ZeroDivisionError:
+            progress_raw = 0
+        return f'{round(progress_raw, 2)}%'
+
+    def speed(self):
+        return f'{get_readable_file_size(self.__obj.speed)}/s'
+
+    def eta(self):
+        # Same smoothed rate as speed(), so the two agree
+        seconds = self.__obj.eta(self.__size)
+        return '-' if seconds is None else get_readable_time(seconds)
+
+    def clients(self):
+        """One line per upload client that is busy: running uploads and bytes in flight."""
+        if self.__status != 'up':
+            return ''
+        return '\n'.join(f'{name}: {busy} upload(s), {get_readable_file_size(inflight)}'
+                         for name, busy, inflight in self.__obj.clients())
+
+    def gid(self):
+        return self.__gid
+
+    def download(self):
+        return self.__obj
+
+    def eng(self):
+        return EngineStatus().STATUS_TG
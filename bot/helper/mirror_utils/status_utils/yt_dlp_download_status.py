@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 
 from bot.helper.ext_utils.bot_utils import EngineStatus  # Importing EngineStatus from bot_utils
-from bot.helper.ext_utils.fs_utils import get_path_size  # Importing get_path_size from fs_utils
+from bot.helper.ext_utils.fs_utils import get_path_stats  # Importing get_path_stats from fs_utils
 from bot.helper.ext_utils.time_utils import get_readable_time  # Importing get_readable_time from time_utils
 from typing import Optional  # Importing Optional from typing
 
@@ -36,7 +36,7 @@ class YtDlpDownloadStatus:
             download_folder = self.obj.get_download_folder()
             if not download_folder:
                 return "Unknown status"
-            size = get_path_size(download_folder)
+            size = get_path_stats(download_folder, use_cache=False)[0]
             return f"Queued - Size: {self._get_readable_size(size)}"
         elif status == EngineStatus.STATUS_DOWNLOADING:
             speed = self.obj.get_download_speed()
@@ -51,7 +51,7 @@ class YtDlpDownloadStatus:
             download_folder = self.obj.get_download_folder()
             if not download_folder:
                 return "Unknown status"
-            size = get_path_size(download_folder)
+            size = get_path_stats(download_folder)[0]
             return f"Complete - Size: {self._get_readable_size(size)}"
         elif status == EngineStatus.STATUS_ERROR:
             error = self.obj.get_error()
@@ -3,15 +3,16 @@ import time
 from typing import Dict, Optional
 
 from bot import LOGGER  # Importing LOGGER from bot module
-from bot.helper.ext_utils.bot_utils import EngineStatus  # Importing EngineStatus from bot_utils module
-from bot.helper.ext_utils.fs_utils import get_path_size  # Importing get_path_size from fs_utils module
+from bot.helper.ext_utils.bot_utils import EngineStatus, MirrorStatus  # Importing EngineStatus and MirrorStatus from bot_utils module
+from bot.helper.ext_utils.fs_utils import get_path_stats  # Importing get_path_stats from fs_utils module
+from bot.helper.ext_utils.speed_estimator import SpeedEstimator  # Shared EWMA speed and ETA estimator
 
 class ZipCreationStatus:
     """
     A class to represent the status of a ZIP archive creation process.
     """
     __slots__ = (
-        'name', 'size', 'listener', 'upload_details', 'uid', 'start_time', 'message', '_processed_raw',
+        'name', 'size', 'listener', 'upload_details', 'uid', 'start_time', 'message', '_processed_raw', '_speed',
     )
 
     def __init__(self, name: str, size: int, listener):
@@ -30,6 +31,7 @@ class ZipCreationStatus:
         self.start_time = time.time()  # Start time of the ZIP archive creation process
         self.message = listener.message  # Message associated with the ZIP archive creation process
         self._processed_raw = 0  # Raw processed size of the ZIP archive in bytes
+        self._speed = SpeedEstimator()  # Windowed speed estimator fed with the processed size
 
     @property
     def processed_raw(self) -> int:
@@ -47,6 +49,15 @@ class ZipCreationStatus:
         :param value: The amount of data processed in bytes.
         """
         self._processed_raw = value
+        self._speed.update(value)  # Feeding the estimator with the new processed size
+
+    def update_progress(self, processed: int):
+        """
+        Push the processed size parsed from the 7z progress stream.
+
+        :param processed: The amount of data processed in bytes, capped at the total size.
+        """
+        self._set_processed_raw(min(processed, self.size))
 
     @property
     def processed(self) -> str:
@@ -55,8 +66,8 @@ class ZipCreationStatus:
 
     @property
     def speed_raw(self) -> float:
-        """Get the speed of the ZIP archive creation in bytes per second."""
-        return self.processed_raw / (time.time() - self.start_time)
+        """Get the recent speed of the ZIP archive creation in bytes per second."""
+        return self._speed.update(self.processed_raw)  # Reading the windowed rate instead of the lifetime average
 
     @property
     def speed(self) -> str:
@@ -79,11 +90,11 @@ class ZipCreationStatus:
     @property
     def eta(self) -> Optional[str]:
         """Get the estimated time of arrival of the ZIP archive creation as a formatted string."""
-        try:
-            seconds_left = (self.size - self.processed_raw) / self.speed_raw  # Calculating the estimated time left
-            return self._format_time(seconds_left)  # Formatting the estimated time left
-        except ZeroDivisionError:
+        self._speed.update(self.processed_raw)  # Making sure the estimator has the latest processed size
+        seconds_left = self._speed.eta(self.size, self.processed_raw)  # Calculating the estimated time left
+        if seconds_left is None:
             return None
+        return self._format_time(seconds_left)  # Formatting the estimated time left
 
     @property
     def status(self) -> EngineStatus:
@@ -119,7 +130,7 @@ class ZipCreationStatus:
     @classmethod
     def from_archive(cls, archive: str) -> 'ZipCreationStatus':
         """Create a new ZipCreationStatus object from an existing archive."""
-        size = get_path_size(archive)  # Getting the size of the existing archive
+        size = get_path_stats(archive)[0]  # Getting the size of the existing archive
         return cls(archive, size, None)  # Creating a new ZipCreationStatus object with the archive name, size, and no listener
 
     @classmethod
@@ -215,3 +226,42 @@ class ZipCreationStatus:
             f'    time_elapsed={self.time_elapsed},\n'
             f')'
         )  # Returning a developer-friendly string representation of the ZipCreationStatus object
+
+
+class ZipStatus(ZipCreationStatus):
+    """
+    Status of the zip stage of a MirrorLeechListener task.
+
+    Progress is pushed by the listener from the 7z ``-bsp1`` stream, so polling it never touches the disk.
+    """
+    __slots__ = ('_gid',)
+
+    def __init__(self, name: str, size: int, gid: str, listener):
+        """
+        Initialize a new ZipStatus object.
+
+        :param name: The name of the task.
+        :param size: The size of the input in bytes.
+        :param gid: The gid of the task.
+        :param listener: The MirrorLeechListener that runs 7z.
+        """
+        super().__init__(name, size, listener)
+        self._gid = gid  # Gid of the task being archived
+
+    def gid(self) -> str:
+        """Get the gid of the task."""
+        return self._gid
+
+    @property
+    def status(self) -> MirrorStatus:
+        """Get the status of the zip stage."""
+        return MirrorStatus.STATUS_ARCHIVING
+
+    async def cancel_download(self):
+        """Cancel the zip stage and log the event."""
+        LOGGER.info(f'Cancelling Archive: {self.name}')
+        if self.listener.suproc is not None:
+            self.listener.suproc.kill()
+        else:
+            self.listener.suproc = 'cancelled'
+        await self.listener.onUploadError('archiving stopped by user!')
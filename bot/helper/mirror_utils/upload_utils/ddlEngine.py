@@ -5,11 +5,19 @@ import os
 import pathlib
 import re
 import time
+import traceback
+import aiofiles
 import aiohttp
 import tenacity
 from typing import Dict, Any, Union, Optional, Callable, List, Tuple, Type, AsyncContextManager
-from gofile import Gofile  # A class for interacting with gofile.io API
-from streamtape import Streamtape  # A class for interacting with streamtape.com API
+from bot.helper.ext_utils.speed_estimator import SpeedEstimator
+from bot.helper.ext_utils.bandwidth import TokenBucket, bandwidth_limiter
+from bot.helper.ext_utils.http_session import get_session
+from bot.helper.mirror_utils.upload_utils.ddlserver.gofile import Gofile, CHUNK_SIZE  # Streams uploads to gofile.io over a pooled session
+from bot.helper.mirror_utils.upload_utils.ddlserver.streamtape import Streamtape, ALLOWED_EXTS  # A class for interacting with streamtape.com API
+
+# User setting key -> display name of every DDL server an upload can fan out to
+DDL_SERVERS = {'gofile': 'GoFile', 'streamtape': 'StreamTape'}
 
 class ProgressFileReader(io.BufferedReader):
     """
@@ -39,6 +47,64 @@ class ProgressFileReader(io.BufferedReader):
         asyncio.sleep(0)  # Yield control to the event loop
         return result
 
+class ChunkTee:
+    """
+    Reads a file once and hands every chunk to each of ``consumers`` streams.
+
+    Every stream has a small bounded queue, so the reader runs at the pace of the
+    slowest destination and at most ``depth`` chunks per stream sit in memory.
+    """
+    def __init__(self, filename: str, consumers: int, throttle: Optional[Callable[[int], Any]] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None, depth: int = 4):
+        self.__filename = filename
+        self.__queues = [asyncio.Queue(depth) for _ in range(consumers)]
+        self.__detached = set()  # Indexes of streams whose upload failed
+        self.__throttle = throttle  # Awaited with every chunk size once, however many streams it feeds
+        self.__is_cancelled = is_cancelled
+
+    async def pump(self):
+        """
+        Reads the file and feeds the chunks to all attached streams, then ends them.
+        """
+        try:
+            async with aiofiles.open(self.__filename, "rb") as file:
+                while len(self.__detached) < len(self.__queues) and (chunk := await file.read(CHUNK_SIZE)):
+                    if self.__is_cancelled is not None and self.__is_cancelled():
+                        break
+                    for index, queue in enumerate(self.__queues):
+                        if index not in self.__detached:
+                            await queue.put(chunk)
+                    if self.__throttle is not None:
+                        await self.__throttle(len(chunk))
+        finally:
+            for index, queue in enumerate(self.__queues):
+                if index not in self.__detached:
+                    await queue.put(None)
+
+    async def stream(self, index: int, progress: Optional[Callable[[int], None]] = None):
+        """
+        Yields the chunks of stream ``index``, calling ``progress`` with the bytes yielded so far.
+        """
+        sent = 0
+        queue = self.__queues[index]
+        while (chunk := await queue.get()) is not None:
+            yield chunk
+            sent += len(chunk)
+            if progress is not None:
+                progress(sent)
+        if self.__is_cancelled is not None and self.__is_cancelled():
+            raise asyncio.CancelledError
+
+    def detach(self, index: int):
+        """
+        Stops feeding stream ``index`` and drops what it had queued, so the reader can't block on it.
+        """
+        self.__detached.add(index)
+        queue = self.__queues[index]
+        while not queue.empty():
+            queue.get_nowait()
+
+
 class DDLUploader:
     """
     A class for uploading files to various DDL servers.
@@ -49,7 +115,8 @@ class DDLUploader:
         :param listener: The listener object to send upload progress and completion events.
         :param name: The name of the file or folder being uploaded.
         :param path: The path to the file or folder being uploaded.
-        :param speed_limit: The maximum upload speed in bytes per second. 0 means no limit.
+        :param speed_limit: The maximum upload speed of this task in bytes per second, on top of the
+            shared bandwidth limits. 0 means no limit.
         """
         self.name = name
         self.__processed_bytes = 0  # The number of processed bytes
@@ -57,19 +124,24 @@ class DDLUploader:
         self.__listener = listener  # The listener object
         self.__path = path  # The path to the file or folder being uploaded
         self.__start_time = time.time()  # The start time of the upload
+        self.__speed = SpeedEstimator()  # Windowed speed estimator fed by the progress callback
         self.total_files = 0  # The total number of files in the folder being uploaded
         self.total_folders = 0  # The total number of folders in the folder being uploaded
         self.is_cancelled = False  # A flag indicating if the upload has been cancelled
         self.__is_errored = False  # A flag indicating if an error occurred during the upload
         self.__ddl_servers: Dict[str, Tuple[bool, str]] = {}  # A dictionary of enabled DDL servers
+        self.server_stats: Dict[str, Dict[str, Any]] = {}  # Bytes sent, speed, link and error per server name
         self.__engine = 'DDL v1'  # The name of the upload engine
-        self.__asyncSession: Optional[AsyncContextManager[aiohttp.ClientSession]] = None  # An aiohttp session
+        self.__tasks: List[asyncio.Task] = []  # Running per-server uploads, cancelled together
         self.__user_id = self.__listener.message.from_user.id  # The user ID
         self.speed_limit = speed_limit  # The maximum upload speed in bytes per second
+        self.__task_bucket = TokenBucket(speed_limit)  # Paces this task alone, the shared budget is in bandwidth_limiter
 
-    def __del__(self):
-        if self.__asyncSession:
-            self.__asyncSession.close()
+    async def throttle(self, amount: int):
+        """
+        Waits until ``amount`` more bytes may be sent under the task, user, engine and global limits.
+        """
+        await asyncio.gather(self.__task_bucket.consume(amount), bandwidth_limiter.consume(self.__user_id, 'ddl', amount))
 
     async def __user_settings(self):
         """
@@ -85,8 +157,7 @@ class DDLUploader:
         chunk_size = current - self.last_uploaded
         self.last_uploaded = current
         self.__processed_bytes += chunk_size
-        if self.speed_limit > 0:
-            await asyncio.sleep(chunk_size / self.speed_limit)
+        self.__speed.update(self.__processed_bytes)
         if self.__listener.onUploadProgress:
             self.__listener.onUploadProgress(self.__processed_bytes)
         return chunk_size
@@ -97,101 +168,159 @@ class DDLUploader:
         """
         Uploads a file using aiohttp.
         """
-        async with aiohttp.ClientSession() as self.__asyncSession:
+        session = get_session('transfer')  # Shared pool, kept open for the next upload
+        try:
+            async with ProgressFileReader(filename=file_path, read_callback=self.__progress_callback) as file:
+                data[req_file] = file
+                async with session.post(url, data=data) as resp:
+                    if resp.status == 200:
+                        try:
+                            return await resp.json()
+                        except aiohttp.ContentTypeError:
+                            return "Uploaded"
+                    return None
+        except aiohttp.ClientError as e:
+            print(e)
+            return None
+        except Exception as e:
+            print(f"Error in upload_aiohttp: {e}")
+            return None
+        finally:
+            file.close()
+
+    async def __upload_to_server(self, serv: str, api_key: str, file_path: str, body=None, progress=None) -> Optional[str]:
+        """
+        Uploads a file or folder to one DDL server and returns its link.
+        """
+        if serv == 'gofile':
+            # Without a shared body Gofile reads the file itself and reports through ``progress``
+            return await Gofile(self, api_key, progress if body is None else None).upload(file_path, body)
+        if serv == 'streamtape':
             try:
-                async with ProgressFileReader(filename=file_path, read_callback=self.__progress_callback) as file:
-                    data[req_file] = file
-                    async with self.__asyncSession.post(url, data=data) as resp:
-                        if resp.status == 200:
-                            try:
-                                return await resp.json()
-                            except aiohttp.ContentTypeError:
-                                return "Uploaded"
-                        return None
-            except aiohttp.ClientError as e:
-                print(e)
-                return None
-            except Exception as e:
-                print(f"Error in upload_aiohttp: {e}")
-                return None
-            finally:
-                file.close()
+                login, key = api_key.split(':')
+            except ValueError:
+                raise Exception("StreamTape Login & Key not Found, Kindly Recheck !")
+            async with Streamtape(self, login, key) as streamtape:
+                if body is not None:
+                    return await streamtape.upload_file(pathlib.Path(file_path), body=body)
+                if not os.path.isfile(file_path):
+                    raise Exception("StreamTape only supports file uploads")
+                return await streamtape.upload(pathlib.Path(file_path))
+        raise Exception(f"Unknown DDL server: {serv}")
+
+    def __server_progress(self, name: str, sent: int):
+        """
+        Records the bytes one server received and moves the task to the slowest server's position.
+        """
+        stat = self.server_stats[name]
+        stat['sent'] = sent
+        stat['speed'].update(sent)
+        current = min(stat['sent'] for stat in self.server_stats.values() if stat['error'] is None)
+        if current > self.last_uploaded:
+            self.__progress_callback(current)
 
     async def __upload_to_ddl(self, file_path: str) -> Optional[Dict[str, str]]:
         """
-        Uploads a file to a DDL server.
-        """
-        for serv, (enabled, api_key) in self.__ddl_servers.items():
-            if enabled:
-                self.total_files = 0
-                self.total_folders = 0
-                if serv == 'gofile':
-                    self.__engine = 'GoFile API'
-                    if os.path.isfile(file_path):
-                        mime_type = get_mime_type(file_path)
-                    else:
-                        mime_type = 'Folder'
-                    try:
-                        nlink = await Gofile(self, api_key).upload(file_path)
-                    except Exception:
-                        continue
-                    return {'GoFile': nlink}
+        Uploads a file or folder to every enabled DDL server at the same time.
+
+        A single file is read from disk once and its chunks are tee'd to all
+        servers, so adding destinations adds network streams but no disk reads.
+        Returns the links of the servers that succeeded.
+        """
+        servers = [(serv, api_key) for serv, (enabled, api_key) in self.__ddl_servers.items()
+                   if enabled and serv in DDL_SERVERS]
+        if not servers:
+            raise Exception("No DDL Server is enabled, enable one in User Settings !")
+        self.total_files, self.total_folders = self.__listener.manifest.count(file_path)  # Counted once by the task manifest
+        self.__engine = ' + '.join(f'{DDL_SERVERS[serv]} API' for serv, _ in servers)
+        self.last_uploaded = 0
+        self.server_stats = {DDL_SERVERS[serv]: {'sent': 0, 'speed': SpeedEstimator(), 'start': time.time(), 'end': None,
+                                                 'link': None, 'error': None} for serv, _ in servers}
+        if os.path.isfile(file_path) and pathlib.Path(file_path).suffix.lower() not in ALLOWED_EXTS:
+            # StreamTape refuses the file without reading it, it must not get a stream the reader would wait on
+            for serv, _ in servers:
                 if serv == 'streamtape':
-                    self.__engine = 'StreamTape API'
-                    if not os.path.isfile(file_path):
-                        raise Exception("StreamTape only supports file uploads")
-                    mime_type = get_mime_type(file_path)
-                    try:
-                        login, key = api_key.split(':')
-                    except ValueError:
-                        raise Exception("StreamTape Login & Key not Found, Kindly Recheck !")
-                    try:
-                        nlink = await Streamtape(self, login, key).upload(file_path)
-                    except Exception:
-                        continue
-                    return {'StreamTape': nlink}
-                self.__processed_bytes = 0
-        return None
+                    self.server_stats[DDL_SERVERS[serv]].update(error='Disallowed extension', end=time.time())
+            servers = [(serv, api_key) for serv, api_key in servers if serv != 'streamtape']
+        tee = ChunkTee(file_path, len(servers), self.throttle, lambda: self.is_cancelled) if os.path.isfile(file_path) and servers else None
+
+        async def upload_to(index: int, serv: str, api_key: str):
+            name = DDL_SERVERS[serv]
+            stat = self.server_stats[name]
+            progress = lambda sent: self.__server_progress(name, sent)
+            try:
+                body = tee.stream(index, progress) if tee is not None else None
+                link = await self.__upload_to_server(serv, api_key, file_path, body, progress)
+                if not isinstance(link, str) or not link.startswith('http'):
+                    raise Exception(link or f"{name} returned no link")
+                stat['link'] = link
+            except Exception as e:
+                stat['error'] = str(e) or e.__class__.__name__
+                print(f"{name} upload failed: {stat['error']}")
+            finally:
+                stat['end'] = time.time()
+                if tee is not None:
+                    # Done, failed or returned without draining its stream, either way it no longer holds the reader back
+                    tee.detach(index)
+
+        self.__tasks = [asyncio.create_task(upload_to(index, serv, api_key)) for index, (serv, api_key) in enumerate(servers)]
+        if tee is not None:
+            self.__tasks.append(asyncio.create_task(tee.pump()))
+        try:
+            await asyncio.gather(*self.__tasks)
+        except asyncio.CancelledError:
+            if not self.is_cancelled:
+                raise
+        finally:
+            self.__tasks = []
+        if self.is_cancelled:
+            return None
+        links = {name: stat['link'] for name, stat in self.server_stats.items() if stat['error'] is None}
+        if not links:
+            raise Exception(' | '.join(f"{name}: {stat['error']}" for name, stat in self.server_stats.items()))
+        return links
 
     async def upload(self, file_name: str, size: int, speed_limit: int = 0) -> Tuple[Optional[Dict[str, Any]], int]:
         """
-        Uploads a file.
+        Uploads a file or folder to all enabled DDL servers.
         """
         item_path = f"{self.__path}/{file_name}"
         print(f"Uploading: {item_path} via DDL")
         await self.__user_settings()
-        tasks = []
         try:
-            for _ in range(3):
-                task = asyncio.create_task(self.__upload_to_ddl(item_path))
-                tasks.append(task)
-            results = await asyncio.gather(*tasks)
-            if any(results):
+            links = await self.__upload_to_ddl(item_path)
+            if links:
                 print(f"Uploaded To DDL: {item_path}")
-                self.__listener.onUploadComplete(dict(results[0]), size, self.total_files, self.total_folders, 'application/octet-stream', file_name)
-                return dict(results[0]), size
+                await self.__listener.onUploadComplete(links, size, self.total_files, self.total_folders, 'application/octet-stream', file_name)
+                return links, size
         except Exception as err:
             print("DDL Upload has been Cancelled")
-            if self.__asyncSession:
-                await self.__asyncSession.close()
             print(traceback.format_exc())
-            self.__listener.onUploadError(str(err))
+            await self.__listener.onUploadError(str(err))
             self.__is_errored = True
-        finally:
-            if self.is_cancelled or self.__is_errored:
-                return {}, 0
-            self.__listener.onUploadSpeed(self.speed)
-            return {}, 0
+        return {}, 0
+
+    def server_throughput(self) -> Dict[str, float]:
+        """
+        Returns the average upload speed of every server in bytes per second.
+        """
+        now = time.time()
+        return {name: stat['sent'] / max((stat['end'] or now) - stat['start'], 1e-3)
+                for name, stat in self.server_stats.items()}
 
     @property
     def speed(self) -> float:
         """
-        Returns the upload speed in bytes per second.
+        Returns the recent upload speed in bytes per second.
         """
-        try:
-            return self.__processed_bytes / int(time.time() - self.__start_time)
-        except ZeroDivisionError:
-            return 0
+        return self.__speed.update(self.__processed_bytes)
+
+    def eta(self, total: int) -> Optional[float]:
+        """
+        Returns the seconds left to send ``total`` bytes at the recent speed, None while it is unknown.
+        """
+        self.__speed.update(self.__processed_bytes)
+        return self.__speed.eta(total, self.__processed_bytes)
 
     @property
     def processed_bytes(self) -> int:
@@ -213,7 +342,7 @@ class DDLUploader:
         """
         self.is_cancelled = True
         print(f"Cancelling Upload: {self.name}")
-        if self.__asyncSession:
-            await self.__asyncSession.close()
-        self.__listener.onUploadError('Your upload has been stopped!')
+        for task in self.__tasks:
+            task.cancel()
+        await self.__listener.onUploadError('Your upload has been stopped!')
         return
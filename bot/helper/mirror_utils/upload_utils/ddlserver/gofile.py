@@ -8,6 +8,32 @@ from aiohttp import ClientSession
 from contextlib import asynccontextmanager
 from typing_extensions import overload
 
+from bot.helper.ext_utils.http_session import get_session
+
+# Bytes read from disk per multipart chunk, also the most a running upload holds in memory
+CHUNK_SIZE = 4 * 1024 * 1024
+
+
+async def read_chunks(file_path: str, progress=None, throttle=None, is_cancelled=None):
+    """
+    Yield ``file_path`` in ``CHUNK_SIZE`` pieces, calling ``progress`` with the bytes sent so far.
+
+    :param throttle: Coroutine function awaited with each chunk size before it is sent.
+    :param is_cancelled: Callable that stops the body early when it returns True.
+    """
+    sent = 0
+    async with aiofiles.open(file_path, "rb") as file:
+        while chunk := await file.read(CHUNK_SIZE):
+            if is_cancelled is not None and is_cancelled():
+                raise asyncio.CancelledError
+            if throttle is not None:
+                await throttle(len(chunk))
+            yield chunk
+            sent += len(chunk)
+            if progress is not None:
+                progress(sent)
+
+
 class GoFileHTTP:
     """
     A class for making requests to the GoFile API.
@@ -20,6 +46,9 @@ class GoFileHTTP:
     Attributes:
         api_url (str): The base URL for the GoFile API.
         token (str): The API token to use for authentication.
+
+    All instances use the shared ``transfer`` session for gofile.io, so uploads
+    and API calls reuse connections instead of opening a session per request.
     """
 
     def __init__(self, token: str = None):
@@ -32,6 +61,13 @@ class GoFileHTTP:
         self.api_url = "https://api.gofile.io/"
         self.token = token
 
+    @staticmethod
+    def session() -> ClientSession:
+        """
+        Returns the pooled gofile.io session from the process-wide registry.
+        """
+        return get_session('transfer', 'gofile.io')
+
     @overload
     async def request(
         self,
@@ -86,19 +122,19 @@ class GoFileHTTP:
         if self.token:
             headers["Authorization"] = f"Bearer {self.token}"
 
-        async with ClientSession() as session:
-            async with session.request(
-                method=method,
-                url=url,
-                data=data,
-                headers=headers,
-                **kwargs,
-            ) as response:
-                response_data = await response.json()
-                return {
-                    "status_code": response.status,
-                    "data": response_data,
-                }
+        session = self.session()
+        async with session.request(
+            method=method,
+            url=url,
+            data=data,
+            headers=headers,
+            **kwargs,
+        ) as response:
+            response_data = await response.json(content_type=None)
+            return {
+                "status_code": response.status,
+                "data": response_data,
+            }
 
     async def get_file_info(self, file_id: str) -> dict[str, Any]:
         """
@@ -111,19 +147,42 @@ class GoFileHTTP:
         url = f"{self.api_url}file/info/{file_id}"
         return await self.request("GET", url)
 
-    async def upload_file(self, file_path: str) -> dict[str, Any]:
+    async def upload_file(
+        self,
+        file_path: str,
+        progress=None,
+        folder_id: str = None,
+        throttle=None,
+        is_cancelled=None,
+        body=None,
+    ) -> dict[str, Any]:
         """
-        Uploads a file to the GoFile API.
+        Uploads a file to the GoFile API as a streamed multipart body.
+
+        The file is read in ``CHUNK_SIZE`` pieces while it is sent, so memory use
+        stays flat whatever the file size.
 
         :param file_path: The path to the file to upload.
+        :param progress: Called with the bytes sent so far after every chunk.
+        :param folder_id: The folder to upload into, a new one is created if not provided.
+        :param throttle: Coroutine function awaited with each chunk size before it is sent.
+        :param is_cancelled: Callable that aborts the upload when it returns True.
+        :param body: Async iterable of the file's chunks to send instead of reading the file,
+            ``progress`` and ``throttle`` are then up to whoever feeds it.
 
         :return: A dictionary containing the uploaded file information.
         """
-        async with aiofiles.open(file_path, "rb") as file:
-            data = await file.read()
-
+        form = aiohttp.FormData()
+        if folder_id:
+            form.add_field("folderId", folder_id)
+        form.add_field(
+            "file",
+            read_chunks(file_path, progress, throttle, is_cancelled) if body is None else body,
+            filename=os.path.basename(file_path),
+            content_type="application/octet-stream",
+        )
         url = f"{self.api_url}file/upload"
-        return await self.request("PUT", url, data=data)
+        return await self.request("PUT", url, data=form)
 
     async def delete_file(self, file_id: str) -> dict[str, Any]:
         """
@@ -135,3 +194,73 @@ class GoFileHTTP:
         """
         url = f"{self.api_url}file/delete/{file_id}"
         return await self.request("DELETE", url)
+
+
+class Gofile:
+    """
+    GoFile uploader used by ``DDLUploader``.
+
+    Folders are uploaded file by file into the GoFile folder created by the
+    first upload, and the link of that folder is returned.
+    """
+
+    def __init__(self, dluploader, token: str = None, progress=None):
+        """
+        :param dluploader: The DDLUploader running the upload.
+        :param token: The GoFile API token.
+        :param progress: Called with the task's bytes sent so far.
+        """
+        self.dluploader = dluploader
+        self.api = GoFileHTTP(token)
+        self.__progress = progress
+        self.__done = 0
+
+    @staticmethod
+    async def is_goapi(token: str) -> bool:
+        """
+        Checks whether ``token`` is a valid GoFile API token.
+        """
+        if not token:
+            return False
+        api = GoFileHTTP(token)
+        try:
+            response = await api.request("GET", f"{api.api_url}accounts/getid")
+        except (aiohttp.ClientError, ValueError):
+            return False
+        return response["status_code"] == 200 and response["data"].get("status") == "ok"
+
+    def __on_progress(self, sent: int) -> None:
+        if self.__progress is not None:
+            self.__progress(self.__done + sent)
+
+    async def upload_file(self, file_path: str, folder_id: str = None, body=None) -> dict[str, Any]:
+        response = await self.api.upload_file(
+            file_path,
+            self.__on_progress,
+            folder_id,
+            getattr(self.dluploader, "throttle", None),
+            lambda: getattr(self.dluploader, "is_cancelled", False),
+            body,
+        )
+        if response["status_code"] != 200 or response["data"].get("status") != "ok":
+            raise Exception(f"GoFile upload failed: {response['data']}")
+        self.__done += os.path.getsize(file_path)
+        return response["data"]["data"]
+
+    async def upload(self, path: str, body=None) -> str:
+        """
+        Uploads a file or a folder and returns its download page.
+
+        ``body`` replaces reading a single file from disk, see ``GoFileHTTP.upload_file``.
+        """
+        if os.path.isfile(path):
+            return (await self.upload_file(path, body=body))["downloadPage"]
+        folder_id = link = None
+        for dirpath, _, files in os.walk(path):
+            for file_ in sorted(files):
+                data = await self.upload_file(os.path.join(dirpath, file_), folder_id)
+                if folder_id is None:
+                    folder_id, link = data["parentFolder"], data["downloadPage"]
+        if link is None:
+            raise Exception("GoFile: nothing to upload")
+        return link
@@ -8,6 +8,8 @@ import aiofiles
 import aiohttp
 from aiohttp import ClientSession
 
+from bot.helper.ext_utils.http_session import get_session
+
 # Allowed file extensions for upload
 ALLOWED_EXTS = [
     ".avi",
@@ -51,7 +53,7 @@ class Streamtape:
 
         :return: The Streamtape instance itself.
         """
-        self.session = aiohttp.ClientSession()
+        self.session = get_session('transfer', 'streamtape.com')
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
@@ -61,9 +63,10 @@ class Streamtape:
         :param exc_type: Exception type.
         :param exc: Exception instance.
         :param tb: Traceback object.
+
+        The session is shared and stays open for the next upload.
         """
-        if self.session:
-            await self.session.close()
+        self.session = None
 
     async def __get_acc_info(self) -> Optional[Dict]:
         """
@@ -113,7 +116,8 @@ class Streamtape:
         return None
 
     async def upload_file(
-        self, file_path: Path, folder_id: Optional[str] = None, sha256: Optional[str] = None, httponly: bool = False
+        self, file_path: Path, folder_id: Optional[str] = None, sha256: Optional[str] = None, httponly: bool = False,
+        body=None,
     ) -> Optional[str]:
         """
         Upload a file.
@@ -122,6 +126,7 @@ class Streamtape:
         :param folder_id: Optional folder ID.
         :param sha256: Optional SHA256 hash.
         :param httponly: Optional HTTP-only flag.
+        :param body: Optional async iterable of the file's chunks, sent instead of reading the file.
 
         :return: The Streamtape URL or a message if the file is skipped.
         """
@@ -145,7 +150,7 @@ class Streamtape:
         self.dluploader.last_uploaded = 0
         async with aiofiles.open(file_path, mode="rb") as f:
             async with self.session.post(
-                upload_info["url"], data=f, headers={"Content-Type": "application/octet-stream"}
+                upload_info["url"], data=f if body is None else body, headers={"Content-Type": "application/octet-stream"}
             ) as response:
                 try:
                     response.raise_for_status()
@@ -307,13 +312,6 @@ class Streamtape:
 
     async def close(self):
         """
-        Close the session.
+        Release the shared session, it is closed by the registry on shutdown.
         """
-        if self.session:
-            await self.session.close()
-
-# Usage example:
-async with Streamtape(dluploader, login, key) as streamtape:
-    result = await streamtape.upload(path_to_file_or_folder)
-    print(result)
-
+        self.session = None
@@ -18,10 +18,14 @@ from bot import OWNER_ID, config_dict, list_drives_dict, GLOBAL_EXTENSION_FILTER
 from bot.helper.ext_utils.bot_utils import setInterval, async_to_sync, get_readable_file_size, fetch_user_tds
 from bot.helper.ext_utils.fs_utils import get_mime_type
 from bot.helper.ext_utils.leech_utils import format_filename
+from bot.helper.ext_utils.bandwidth import bandwidth_limiter
 
 # Create a Request object for logging in with Google
 LOGGER = Request()
 
+# Bytes sent per resumable upload request, a multiple of 256 KiB as Drive requires
+UPLOAD_CHUNK_SIZE = 32 * 1024 * 1024
+
 # Configure logging for the Google API client
 logging.getLogger('googleapiclient.discovery').setLevel(logging.ERROR)
 
@@ -61,25 +65,38 @@ def download_file(service: googleapiclient.discovery.Resource, file_id: str, fil
                     break
                 file.write(chunk)
 
-def upload_file(service: googleapiclient.discovery.Resource, file_path: str, mime_type: str, parents: Optional[List[str]] = None) -> str:
+def upload_file(service: googleapiclient.discovery.Resource, file_path: str, mime_type: str, parents: Optional[List[str]] = None,
+                *, user_id: Optional[int]) -> str:
     """
-    Uploads a file to Google Drive and returns its file ID.
+    Uploads a file to Google Drive in resumable chunks and returns its file ID.
+
+    Each chunk first draws its size from the shared bandwidth budget of ``user_id``.
     """
     file_name = os.path.basename(file_path)
-    media = MediaFileUpload(file_path, mime_type=mime_type, resumable=True)
+    media = MediaFileUpload(file_path, mime_type=mime_type, resumable=True, chunksize=UPLOAD_CHUNK_SIZE)
     request = service.files().create(body={'name': file_name, 'mimeType': mime_type, 'parents': parents}, media_body=media, fields='id')
-    response = request.execute()
+    response = None
+    size = os.path.getsize(file_path)
+    sent = 0
+    while response is None:
+        bandwidth_limiter.consume_sync(user_id, 'gd', min(UPLOAD_CHUNK_SIZE, size - sent) or 1)
+        status, response = request.next_chunk()
+        if status:
+            sent = status.resumable_progress
     return response.get('id')
 
 @retry(wait=wait_exponential(multiplier=1, min=1, max=60), stop=stop_after_attempt(3), retry=retry_if_exception_type(HttpError))
-def retry_upload_file(service: googleapiclient.discovery.Resource, file_path: str, mime_type: str, parents: Optional[List[str]] = None) -> str:
+def retry_upload_file(service: googleapiclient.discovery.Resource, file_path: str, mime_type: str, parents: Optional[List[str]] = None,
+                      *, user_id: Optional[int]) -> str:
     """
     Retries uploading a file to Google Drive until it succeeds or the maximum number of retries is reached.
+
+    ``user_id`` is required so the upload draws from its owner's share of the bandwidth budget.
     """
-    return upload_file(service, file_path, mime_type, parents)
+    return upload_file(service, file_path, mime_type, parents, user_id=user_id)
 
 @asyncio.coroutine
-def main():
+def main(user_id: Optional[int] = None):
     """
     The main function of the script.
     """
@@ -93,7 +110,7 @@ def main():
     download_file(service, file_id, file_path)
 
     # Upload the file to Google Drive
-    file_id = retry_upload_file(service, file_path, mime_type, parents)
+    file_id = retry_upload_file(service, file_path, mime_type, parents, user_id=user_id)
     print(f'File uploaded successfully: {file_id}')
 
 if __name__ == '__main__':
@@ -1,9 +1,366 @@
 #!/usr/bin/env python3
 
 import os
+import re
 import asyncio
-import time
 from traceback import format_exc
-from logging import getLogger, ERROR, basicConfig
-from typing import List, Any
+from contextlib import suppress
+from typing import List, Any, NamedTuple, Optional
 
+from aiofiles.os import path as aiopath, remove as aioremove
+
+from pyrogram import StopTransmission, raw, types, utils
+from pyrogram.enums import ParseMode
+from pyrogram.errors import FloodWait, RPCError
+
+from bot import LOGGER, bot, config_dict, user_data
+from bot.helper.ext_utils.bot_utils import sync_to_async
+from bot.helper.ext_utils.fs_utils import get_mime_type
+from bot.helper.ext_utils.leech_utils import (RangeReader, format_filename, get_audio_thumb, get_document_type,
+                                              get_media_info, take_ss)
+from bot.helper.ext_utils.speed_estimator import SpeedEstimator
+from bot.helper.ext_utils.bandwidth import bandwidth_limiter
+from bot.helper.ext_utils.stream_archive import CancelledArchive
+from bot.helper.ext_utils.upload_clients import upload_clients
+
+
+# Telegram refuses larger photos, those are sent as documents
+PHOTO_LIMIT = 10 * 1024 * 1024
+
+
+class UploadJob(NamedTuple):
+    """A file, or a byte range of one when ``start`` is set, sent as one message. ``remove`` deletes it once sent."""
+    path: str
+    name: str
+    size: int
+    start: Optional[int] = None
+    remove: bool = False
+
+
+def _natural_key(path: str) -> List[Any]:
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', path)]
+
+
+class TgUploader:
+    """
+    Uploads a leech to Telegram over a pool of clients.
+
+    Files and split parts are uploaded at the same time, each on the client of
+    ``upload_clients`` with the most spare capacity, and their messages are sent
+    one after another in natural file order as soon as every earlier one is out.
+    An upload only starts once the pool has a free slot for it. A message has to
+    come from the client the file was uploaded with, so when a helper is refused
+    by the chat the file is uploaded again with the bot.
+
+    Videos, audio and photos are sent as media with their attributes and a
+    thumbnail unless the user leeches as documents; parts and volumes are always
+    documents.
+
+    It registers itself as the listener's ``archive_volume_handler``, volumes of
+    a streamed zip are queued as soon as they close and deleted once sent.
+    """
+
+    def __init__(self, name: str, path: str, listener):
+        """
+        :param name: The name of the file or folder being uploaded.
+        :param path: The path to the file or folder being uploaded.
+        :param listener: The task listener to report completion and errors to.
+        """
+        self.name = name
+        self.__path = path
+        self.__listener = listener
+        self.__user_id = listener.message.from_user.id
+        self.__processed_bytes = 0  # Bytes sent by every running and finished upload
+        self.__speed = SpeedEstimator()
+        self.__engine = 'Pyro v2'
+        self.__is_cancelled = False
+        self.__tasks: List[asyncio.Task] = []  # Running uploads, in message order
+        self.__msgs_dict = {}  # Message link -> file name, in message order
+        self.__total_files = 0
+        self.__corrupted = 0
+        self.__last_msg = None
+        self.__chat_id = None
+        self.__clients = []
+        self.__pending = asyncio.Queue()  # Jobs not uploading yet in message order, None once every job is queued
+        self.__queue = asyncio.Queue()  # (job, upload task) in message order, None once every job is started
+        self.__slots: Optional[asyncio.Semaphore] = None
+        self.__launcher: Optional[asyncio.Task] = None
+        self.__sender: Optional[asyncio.Task] = None
+        self.__start_lock = asyncio.Lock()
+        self.__on_disk = 0  # Streamed volumes not sent yet
+        self.__sent_cond = asyncio.Condition()
+        self.streamed_size = 0  # Bytes of the volumes handed over while the zip was written
+        user_dict = user_data.get(self.__user_id, {})
+        self.__as_doc = user_dict.get('as_doc', False) or 'as_doc' not in user_dict and config_dict['AS_DOCUMENT']
+        thumb = f'Thumbnails/{self.__user_id}.jpg'
+        self.__thumb = thumb if os.path.exists(thumb) else None
+        listener.archive_volume_handler = self.upload_volume
+
+    def __destination(self):
+        """Chat the files are sent to and the message the first one replies to."""
+        if log_id := str(config_dict['LEECH_LOG_ID']).split():
+            return int(log_id[0]), None
+        return self.__listener.message.chat.id, self.__listener.message
+
+    def __jobs(self, o_files: List[str]) -> List[UploadJob]:
+        """Every file to send in natural order, virtually split files as their parts."""
+        jobs = []
+        for f_path, entry in sorted(self.__listener.manifest.files(self.__path), key=lambda item: _natural_key(item[0])):
+            file_ = os.path.basename(f_path)
+            if entry.filtered or file_ in o_files:
+                continue
+            if entry.size == 0:
+                LOGGER.error(f'{f_path} size is zero, Telegram does not allow uploading empty files')
+                self.__corrupted += 1
+                continue
+            if parts := self.__listener.virtual_splits.get(f_path):
+                jobs.extend(UploadJob(f_path, part_name, length, start) for part_name, start, length in parts)
+            else:
+                jobs.append(UploadJob(f_path, file_, entry.size))
+        return jobs
+
+    async def __save(self, job: UploadJob, clients: List[Any]):
+        """Uploads the bytes of ``job`` on the least busy client, returns the client and its input file."""
+        sent = 0
+
+        async def progress(current: int, total: int):
+            nonlocal sent
+            if self.__is_cancelled:
+                client.stop_transmission()
+            delta, sent = current - sent, current
+            self.__processed_bytes += delta
+            self.__speed.update(self.__processed_bytes)
+            await bandwidth_limiter.consume(self.__user_id, 'tg', delta)
+
+        async with upload_clients.acquire(job.size, clients) as client:
+            source = job.path if job.start is None else RangeReader(job.path, job.start, job.size, job.name)
+            try:
+                return client, await client.save_file(source, progress=progress)
+            except BaseException:
+                # The next attempt starts from zero again
+                self.__processed_bytes -= sent
+                raise
+            finally:
+                if job.start is not None:
+                    source.close()
+
+    async def __media(self, job: UploadJob, client, input_file):
+        """The media of ``job`` and the temporary thumbnail made for it, if any."""
+        file_name, caption = await format_filename(job.name, self.__user_id)
+        attributes = [raw.types.DocumentAttributeFilename(file_name=file_name)]
+        is_video = is_audio = is_image = False
+        if job.start is None and not job.remove:
+            is_video, is_audio, is_image = await get_document_type(job.path)
+        if is_image and not self.__as_doc and job.size <= PHOTO_LIMIT:
+            return raw.types.InputMediaUploadedPhoto(file=input_file), caption, file_name, None
+        thumb = temp_thumb = None
+        if is_video or is_audio:
+            duration, artist, title, width, height = await get_media_info(job.path)
+            if (thumb := self.__thumb) is None:
+                thumb = temp_thumb = await (take_ss(job.path, duration) if is_video else get_audio_thumb(job.path))
+            if is_video and not self.__as_doc:
+                attributes.append(raw.types.DocumentAttributeVideo(duration=duration, w=width or 480, h=height or 320,
+                                                                   supports_streaming=True))
+            elif not self.__as_doc:
+                attributes.append(raw.types.DocumentAttributeAudio(duration=duration, performer=artist, title=title))
+        elif job.start is None and not job.remove:
+            thumb = self.__thumb
+        media = raw.types.InputMediaUploadedDocument(
+            mime_type=await sync_to_async(get_mime_type, job.path) if job.start is None else 'application/octet-stream',
+            file=input_file, force_file=self.__as_doc or not (is_video or is_audio),
+            thumb=await client.save_file(thumb) if thumb else None, attributes=attributes)
+        return media, caption, file_name, temp_thumb
+
+    async def __send(self, job: UploadJob, client, input_file, chat_id: int):
+        """Posts an uploaded file, replying to the previous message of this leech."""
+        reply_to = self.__last_msg if self.__last_msg and self.__last_msg._client is client else None
+        media, caption, file_name, temp_thumb = await self.__media(job, client, input_file)
+        try:
+            while True:
+                try:
+                    r = await client.invoke(raw.functions.messages.SendMedia(
+                        peer=await client.resolve_peer(chat_id), media=media, random_id=client.rnd_id(),
+                        reply_to_msg_id=reply_to.id if reply_to else None, silent=True,
+                        **await utils.parse_text_entities(client, caption or f'<code>{file_name}</code>', ParseMode.HTML, None)))
+                    break
+                except FloodWait as f:
+                    LOGGER.warning(f'FloodWait of {f.value}s while sending {file_name}')
+                    await asyncio.sleep(f.value * 1.2)
+        finally:
+            if temp_thumb is not None:
+                with suppress(OSError):
+                    await aioremove(temp_thumb)
+        for update in r.updates:
+            if isinstance(update, (raw.types.UpdateNewMessage, raw.types.UpdateNewChannelMessage)):
+                return await types.Message._parse(client, update.message, {u.id: u for u in r.users},
+                                                  {c.id: c for c in r.chats})
+
+    async def __deliver(self, job: UploadJob, task: asyncio.Task, chat_id: int):
+        """Sends the upload of ``job`` once it is done, falling back to the bot when a helper can't post."""
+        client, input_file = await task
+        try:
+            return await self.__send(job, client, input_file, chat_id)
+        except RPCError as e:
+            if client is bot:
+                raise
+            LOGGER.warning(f'{client.name} could not send {job.name}, retrying with the bot: {e}')
+            upload_clients.forbid(client, chat_id)
+            # Sent again in full, the helper's copy is lost
+            self.__processed_bytes -= job.size
+        client, input_file = await self.__save(job, [bot])
+        return await self.__send(job, client, input_file, chat_id)
+
+    async def __start(self):
+        """Resolves the chat and its clients and starts sending, once."""
+        async with self.__start_lock:
+            if self.__sender is None:
+                self.__chat_id, self.__last_msg = self.__destination()
+                self.__clients = await upload_clients.clients(self.__chat_id)
+                self.__slots = asyncio.Semaphore(upload_clients.capacity(self.__clients))
+                self.__launcher = asyncio.create_task(self.__launch())
+                self.__sender = asyncio.create_task(self.__send_all())
+
+    def __enqueue(self, job: UploadJob):
+        self.__pending.put_nowait(job)
+
+    async def __launch(self):
+        """Starts the upload of each queued job once the pool has a slot free for it."""
+        while (job := await self.__pending.get()) is not None:
+            await self.__slots.acquire()
+            task = asyncio.create_task(self.__save(job, self.__clients))
+            task.add_done_callback(lambda _: self.__slots.release())
+            self.__tasks.append(task)
+            self.__queue.put_nowait((job, task))
+        self.__queue.put_nowait(None)
+
+    async def __send_all(self):
+        """Sends the queued uploads one after another in the order they were queued."""
+        while (item := await self.__queue.get()) is not None:
+            job, task = item
+            try:
+                msg = await self.__deliver(job, task, self.__chat_id)
+            except (StopTransmission, asyncio.CancelledError):
+                if self.__is_cancelled:
+                    return
+                raise
+            except Exception as e:
+                LOGGER.error(f'{e}. Path: {job.path}')
+                LOGGER.debug(format_exc())
+                msg = None
+            finally:
+                if job.remove:
+                    with suppress(OSError):
+                        await aioremove(job.path)
+                    async with self.__sent_cond:
+                        self.__on_disk -= 1
+                        self.__sent_cond.notify_all()
+            if msg is None:
+                self.__corrupted += 1
+                continue
+            self.__last_msg = msg
+            self.__msgs_dict[msg.link] = job.name
+            self.__total_files += 1
+
+    async def upload_volume(self, volume: str):
+        """
+        Archive volume handler, queues a volume of a streamed zip as soon as it is closed.
+
+        The archiver waits here while the pool's slots are all taken by volumes
+        that were not sent yet, so finished volumes don't pile up on disk.
+        """
+        size = await aiopath.getsize(volume)
+        await self.__start()
+        if self.__is_cancelled:
+            raise CancelledArchive
+        self.streamed_size += size
+        self.__on_disk += 1
+        self.__enqueue(UploadJob(volume, os.path.basename(volume), size, remove=True))
+        async with self.__sent_cond:
+            await self.__sent_cond.wait_for(
+                lambda: self.__is_cancelled or self.__on_disk < upload_clients.capacity(self.__clients))
+        if self.__is_cancelled:
+            raise CancelledArchive
+
+    async def upload(self, o_files: List[str], m_size: List[int], size: int):
+        """
+        Uploads every file below the task path and reports the links to the listener.
+
+        :param o_files: Names of files kept for seeding that were uploaded as split parts instead.
+        :param m_size: Sizes of ``o_files``, already left out of ``size`` by the listener.
+        :param size: Total bytes to upload, streamed volumes included.
+        """
+        try:
+            await self.__start()
+            jobs = self.__jobs(o_files)
+            if len(self.__clients) > 1:
+                LOGGER.info(f'Leeching {len(jobs)} file(s) of {self.name} over {len(self.__clients)} clients')
+            for job in jobs:
+                self.__enqueue(job)
+            self.__pending.put_nowait(None)
+            await self.__sender
+        except asyncio.CancelledError:
+            if not self.__is_cancelled:
+                raise
+        finally:
+            await self.__stop_tasks()
+        if self.__is_cancelled:
+            return
+        if self.__total_files == 0:
+            await self.__listener.onUploadError('Files Corrupted or unable to upload. Check logs!')
+            return
+        LOGGER.info(f'Leech Completed: {self.name}')
+        await self.__listener.onUploadComplete(None, size, self.__msgs_dict, self.__total_files, self.__corrupted, self.name)
+
+    async def __stop_tasks(self):
+        tasks = self.__tasks + [task for task in (self.__launcher, self.__sender) if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        async with self.__sent_cond:
+            self.__sent_cond.notify_all()
+
+    async def abort(self):
+        """Stops the uploads of streamed volumes without reporting, for a zip that failed or was cancelled."""
+        self.__is_cancelled = True
+        await self.__stop_tasks()
+
+    def clients(self):
+        """``(client name, busy slots, bytes in flight)`` of the pool while this leech runs."""
+        return upload_clients.load()
+
+    @property
+    def speed(self) -> float:
+        """
+        Returns the recent upload speed in bytes per second.
+        """
+        return self.__speed.update(self.__processed_bytes)
+
+    def eta(self, total: int) -> Optional[float]:
+        """
+        Returns the seconds left to send ``total`` bytes at the recent speed, None while it is unknown.
+        """
+        self.__speed.update(self.__processed_bytes)
+        return self.__speed.eta(total, self.__processed_bytes)
+
+    @property
+    def processed_bytes(self) -> int:
+        """
+        Returns the number of processed bytes.
+        """
+        return self.__processed_bytes
+
+    @property
+    def engine(self) -> str:
+        """
+        Returns the name of the upload engine.
+        """
+        return self.__engine
+
+    async def cancel_download(self):
+        """
+        Cancels the current upload.
+        """
+        self.__is_cancelled = True
+        LOGGER.info(f'Cancelling Upload: {self.name}')
+        await self.__stop_tasks()
+        await self.__listener.onUploadError('Your upload has been stopped!')
@@ -1,13 +1,23 @@
 import asyncio
 import os
+from hashlib import md5
 from re import match as re_match
-from typing import Any, Dict, List, Optional
+from time import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiofiles.os as aio_os
 import cryptography.fernet as fernet
 import pyrogram
 from pyrogram.enums import ParseMode
-from pyrogram.errors import FloodWait, InputUserDeactivated, UserIsBlocked
+from pyrogram.errors import FloodWait, InputUserDeactivated, UserIsBlocked, MessageNotModified
+
+from bot import LOGGER, Interval, status_reply_dict, status_reply_dict_lock, download_dict, download_dict_lock
+from bot.helper.ext_utils.bot_utils import get_readable_message, sync_to_async
+from bot.helper.ext_utils.engine_snapshot import engine_snapshot
+from bot.helper.telegram_helper.status_scheduler import status_scheduler
+
+# chat_id -> (status message id, digest of the text and buttons it currently shows)
+status_digests: Dict[int, Tuple[int, str]] = {}
 
 async def send_message(client: pyrogram.Client, chat_id: int, text: str):
     try:
@@ -35,6 +45,49 @@ def decrypt_data(data: bytes, fernet_key: bytes) -> bytes:
 def is_valid_filename(filename: str) -> bool:
     return re_match(r'^[a-zA-Z0-9._-]+$', filename) is not None
 
+def status_digest(text: str, buttons: Any) -> str:
+    return md5(f"{text}{buttons}".encode()).hexdigest()
+
+async def render_status() -> Tuple[Optional[str], Any]:
+    await engine_snapshot.refresh()
+    download_dict.reindex_all()
+    async with download_dict_lock:
+        return await sync_to_async(get_readable_message)
+
+async def update_all_messages(force: bool = False):
+    async with status_reply_dict_lock:
+        if not status_reply_dict or not Interval or (not force and time() - list(status_reply_dict.values())[0][1] < 3):
+            return
+        for chat_id in list(status_reply_dict.keys()):
+            status_reply_dict[chat_id][1] = time()
+    # Every chat shows the same page, so one render per tick is shared by all of them
+    msg, buttons = await render_status()
+    if msg is None:
+        return
+    digest = status_digest(msg, buttons)
+    async with status_reply_dict_lock:
+        for chat_id in list(status_reply_dict.keys()):
+            message = status_reply_dict[chat_id][0]
+            if status_digests.get(chat_id) == (message.id, digest) or not status_scheduler.is_due(chat_id, force):
+                continue
+            try:
+                await message.edit(text=msg, disable_web_page_preview=True, reply_markup=buttons)
+                status_scheduler.on_edit(chat_id)
+            except MessageNotModified:
+                status_scheduler.on_not_modified(chat_id)
+            except FloodWait as f:
+                LOGGER.warning(f"Status edit in {chat_id}: {f}")
+                status_scheduler.on_flood_wait(chat_id, f.value)
+                continue
+            except Exception as e:
+                LOGGER.error(f"Status edit in {chat_id}: {e}")
+                del status_reply_dict[chat_id]
+                status_digests.pop(chat_id, None)
+                status_scheduler.remove(chat_id)
+                continue
+            status_digests[chat_id] = (message.id, digest)
+            status_reply_dict[chat_id][1] = time()
+
 async def main():
     # Initialize the Pyrogram client
     client = pyrogram.Client("my_bot")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+from collections import deque
+from time import time
+
+from bot import config_dict
+
+MAX_INTERVAL = 120
+EDIT_BUDGET = 20
+BUDGET_WINDOW = 60
+BACKOFF = 2
+NOT_MODIFIED_BACKOFF = 1.5
+SPEEDUP = 0.8
+
+
+class ChatRefresh:
+    __slots__ = ('interval', 'next_due', 'flood_until', 'edits')
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.next_due = 0
+        self.flood_until = 0
+        self.edits = deque()
+
+
+class StatusRefreshScheduler:
+    """
+    Per-chat status refresh intervals driven by Telegram's feedback.
+
+    A chat that gets FloodWait or MessageNotModified is backed off, a chat whose
+    edits go through while it still has budget left in the current window is
+    sped back up towards ``STATUS_UPDATE_INTERVAL``.
+    """
+
+    def __init__(self):
+        self.__chats = {}
+
+    @staticmethod
+    def __base():
+        return config_dict.get('STATUS_UPDATE_INTERVAL', 10)
+
+    def __chat(self, chat_id):
+        if (chat := self.__chats.get(chat_id)) is None:
+            chat = self.__chats[chat_id] = ChatRefresh(self.__base())
+        return chat
+
+    @staticmethod
+    def __trim(chat, now):
+        while chat.edits and now - chat.edits[0] > BUDGET_WINDOW:
+            chat.edits.popleft()
+
+    def is_due(self, chat_id, force=False):
+        now = time()
+        chat = self.__chat(chat_id)
+        self.__trim(chat, now)
+        # A forced update skips the interval, never a FloodWait Telegram asked for
+        if len(chat.edits) >= EDIT_BUDGET or now < chat.flood_until:
+            return False
+        return force or now >= chat.next_due
+
+    def on_edit(self, chat_id):
+        now = time()
+        chat = self.__chat(chat_id)
+        chat.edits.append(now)
+        self.__trim(chat, now)
+        if len(chat.edits) < EDIT_BUDGET // 2:
+            chat.interval = max(self.__base(), chat.interval * SPEEDUP)
+        chat.next_due = now + chat.interval
+
+    def on_not_modified(self, chat_id):
+        chat = self.__chat(chat_id)
+        chat.interval = min(MAX_INTERVAL, chat.interval * NOT_MODIFIED_BACKOFF)
+        chat.next_due = time() + chat.interval
+
+    def on_flood_wait(self, chat_id, wait):
+        chat = self.__chat(chat_id)
+        chat.interval = min(MAX_INTERVAL, max(chat.interval * BACKOFF, wait))
+        chat.flood_until = time() + wait
+        chat.next_due = time() + max(wait, chat.interval)
+
+    def remove(self, chat_id):
+        self.__chats.pop(chat_id, None)
+
+    def intervals(self):
+        now = time()
+        result = {}
+        for chat_id, chat in list(self.__chats.items()):
+            self.__trim(chat, now)
+            result[chat_id] = (round(chat.interval, 1), EDIT_BUDGET - len(chat.edits))
+        return result
+
+
+status_scheduler = StatusRefreshScheduler()
@@ -22,6 +22,8 @@ from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.ext_utils.bot_utils import setInterval, sync_to_async, new_thread
 from bot.helper.ext_utils.db_handler import DbManger
 from bot.helper.ext_utils.task_manager import start_from_queued
+from bot.helper.ext_utils.cpu_executor import cpu_executor
+from bot.helper.ext_utils.bandwidth import bandwidth_limiter
 from bot.helper.ext_utils.help_messages import default_desp
 from bot.helper.mirror_utils.rclone_utils.serve import rclone_serve_booter
 from bot.modules.torrent_search import initiate_search_tools
@@ -41,6 +43,7 @@ default_values = {'AUTO_DELETE_MESSAGE_DURATION': 30,
                   'UPSTREAM_BRANCH': 'master',
                   'BOT_THEME': 'minimal',
                   'BOT_LANG': 'en',
+                  'ZIP_PROFILE': 'store',
                   'IMG_PAGE': 1,
                   'AUTHOR_NAME': 'WZML-X',
                   'AUTHOR_URL': 'https://t.me/WZML_X',
@@ -244,6 +247,11 @@ async def load_config():
 
     USER_SESSION_STRING = environ.get('USER_SESSION_STRING', '')
 
+    HELPER_BOT_TOKENS = environ.get('HELPER_BOT_TOKENS', '')
+
+    LEECH_PARALLEL = environ.get('LEECH_PARALLEL', '')
+    LEECH_PARALLEL = '' if len(LEECH_PARALLEL) == 0 else int(LEECH_PARALLEL)
+
     TORRENT_TIMEOUT = environ.get('TORRENT_TIMEOUT', '')
     downloads = aria2.get_downloads()
     if len(TORRENT_TIMEOUT) == 0:
@@ -278,6 +286,24 @@ async def load_config():
     QUEUE_UPLOAD = environ.get('QUEUE_UPLOAD', '')
     QUEUE_UPLOAD = '' if len(QUEUE_UPLOAD) == 0 else int(QUEUE_UPLOAD)
 
+    QUEUE_CPU = environ.get('QUEUE_CPU', '')
+    QUEUE_CPU = '' if len(QUEUE_CPU) == 0 else int(QUEUE_CPU)
+
+    EXTRACT_PARALLEL = environ.get('EXTRACT_PARALLEL', '')
+    EXTRACT_PARALLEL = '' if len(EXTRACT_PARALLEL) == 0 else int(EXTRACT_PARALLEL)
+
+    ZIP_PROFILE = environ.get('ZIP_PROFILE', '')
+    if len(ZIP_PROFILE) == 0:
+        ZIP_PROFILE = 'store'
+
+    SPEED_LIMIT = environ.get('SPEED_LIMIT', '')
+    SPEED_LIMIT = '' if len(SPEED_LIMIT) == 0 else float(SPEED_LIMIT)
+
+    USER_SPEED_LIMIT = environ.get('USER_SPEED_LIMIT', '')
+    USER_SPEED_LIMIT = '' if len(USER_SPEED_LIMIT) == 0 else float(USER_SPEED_LIMIT)
+
+    ENGINE_SPEED_LIMIT = environ.get('ENGINE_SPEED_LIMIT', '')
+
     INCOMPLETE_TASK_NOTIFIER = environ.get('INCOMPLETE_TASK_NOTIFIER', '')
     INCOMPLETE_TASK_NOTIFIER = INCOMPLETE_TASK_NOTIFIER.lower() == 'true'
     if not INCOMPLETE_TASK_NOTIFIER and DATABASE_URL:
@@ -660,6 +686,12 @@ async def load_config():
                         'QUEUE_ALL': QUEUE_ALL,
                         'QUEUE_DOWNLOAD': QUEUE_DOWNLOAD,
                         'QUEUE_UPLOAD': QUEUE_UPLOAD,
+                        'QUEUE_CPU': QUEUE_CPU,
+                        'EXTRACT_PARALLEL': EXTRACT_PARALLEL,
+                        'ZIP_PROFILE': ZIP_PROFILE,
+                        'SPEED_LIMIT': SPEED_LIMIT,
+                        'USER_SPEED_LIMIT': USER_SPEED_LIMIT,
+                        'ENGINE_SPEED_LIMIT': ENGINE_SPEED_LIMIT,
                         'RCLONE_FLAGS': RCLONE_FLAGS,
                         'RCLONE_PATH': RCLONE_PATH,
                         'RCLONE_SERVE_URL': RCLONE_SERVE_URL,
@@ -691,6 +723,8 @@ async def load_config():
                         'UPSTREAM_BRANCH': UPSTREAM_BRANCH,
                         'UPGRADE_PACKAGES': UPGRADE_PACKAGES,
                         'USER_SESSION_STRING': USER_SESSION_STRING,
+                        'HELPER_BOT_TOKENS': HELPER_BOT_TOKENS,
+                        'LEECH_PARALLEL': LEECH_PARALLEL,
                         'USER_TD_MODE':USER_TD_MODE,
                         'USER_TD_SA': USER_TD_SA,
                         'USE_SERVICE_ACCOUNTS': USE_SERVICE_ACCOUNTS,
@@ -699,7 +733,7 @@ async def load_config():
 
     if DATABASE_URL:
         await DbManger().update_config(config_dict)
-    await gather(initiate_search_tools(), start_from_queued(), rclone_serve_booter())
+    await gather(initiate_search_tools(), start_from_queued(), rclone_serve_booter(), bandwidth_limiter.apply_client_limits())
 
 
 async def get_buttons(key=None, edit_type=None, edit_mode=None, mess=None):
@@ -874,6 +908,10 @@ async def edit_variable(_, message, pre_message, key):
         await initiate_search_tools()
     elif key in ['QUEUE_ALL', 'QUEUE_DOWNLOAD', 'QUEUE_UPLOAD']:
         await start_from_queued()
+    elif key == 'QUEUE_CPU':
+        cpu_executor.dispatch()
+    elif key in ['SPEED_LIMIT', 'USER_SPEED_LIMIT', 'ENGINE_SPEED_LIMIT']:
+        await bandwidth_limiter.apply_client_limits()
     elif key in ['RCLONE_SERVE_URL', 'RCLONE_SERVE_PORT', 'RCLONE_SERVE_USER', 'RCLONE_SERVE_PASS']:
         await rclone_serve_booter()
 
@@ -1129,6 +1167,10 @@ async def edit_bot_settings(client, query):
             await initiate_search_tools()
         elif data[2] in ['QUEUE_ALL', 'QUEUE_DOWNLOAD', 'QUEUE_UPLOAD']:
             await start_from_queued()
+        elif data[2] == 'QUEUE_CPU':
+            cpu_executor.dispatch()
+        elif data[2] in ['SPEED_LIMIT', 'USER_SPEED_LIMIT', 'ENGINE_SPEED_LIMIT']:
+            await bandwidth_limiter.apply_client_limits()
         elif data[2] in ['RCLONE_SERVE_URL', 'RCLONE_SERVE_PORT', 'RCLONE_SERVE_USER', 'RCLONE_SERVE_PASS']:
             await rclone_serve_booter()
     elif data[1] == 'resetaria':
@@ -11,7 +11,7 @@ from bot import download_dict, bot, bot_name, download_dict_lock, OWNER_ID, user
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.message_utils import sendMessage, deleteMessage, auto_delete_message
-from bot.helper.ext_utils.bot_utils import get_download_by_gid, get_all_downloads, MirrorStatus, new_task
+from bot.helper.ext_utils.bot_utils import MirrorStatus, new_task
 from bot.helper.telegram_helper import button_build
 
 async def cancel_mirror(client, message):
@@ -26,7 +26,7 @@ async def cancel_mirror(client, message):
     if cmd_name != bot_name:
         return
 
-    download_info = await get_download_by_gid(gid)
+    download_info = download_dict.by_gid(gid)
 
     if not download_info:
         return await sendMessage(message, f"GID: `{gid}` Not Found.")
@@ -39,7 +39,10 @@ async def cancel_mirror(client, message):
 
 
 async def cancel_all(status: MirrorStatus) -> bool:
-    matches = await get_all_downloads(status)
+    if status == 'all':
+        matches = list(download_dict.snapshot().values())
+    else:
+        matches = download_dict.by_status(status, live=True)
     if not matches:
         return False
 
@@ -51,9 +54,7 @@ async def cancel_all(status: MirrorStatus) -> bool:
 
 
 async def cancel_all_buttons(client, message: Message):
-    async with download_dict_lock:
-        count = len(download_dict)
-    if count == 0:
+    if len(download_dict.snapshot()) == 0:
         return await sendMessage(message, "No active tasks!")
 
     buttons = button_build.ButtonMaker()
@@ -65,6 +66,7 @@ async def cancel_all_buttons(client, message: Message):
     buttons.ibutton("Archiving", f"canall {MirrorStatus.STATUS_ARCHIVING}")
     buttons.ibutton("QueuedDl", f"canall {MirrorStatus.STATUS_QUEUEDL}")
     buttons.ibutton("QueuedUp", f"canall {MirrorStatus.STATUS_QUEUEUP}")
+    buttons.ibutton("WaitCPU", f"canall {MirrorStatus.STATUS_WAITCPU}")
     buttons.ibutton("Paused", f"canall {MirrorStatus.STATUS_PAUSED}")
     buttons.ibutton("All", "canall all")
     buttons.ibutton("Close", "canall close")
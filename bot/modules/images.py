@@ -15,6 +15,7 @@ from pyrogram.errors import FloodWait
 from bot import bot, LOGGER, config_dict, DATABASE_URL
 from bot.helper.telegram_helper.message_utils import sendMessage, editMessage, deleteMessage
 from bot.helper.ext_utils.bot_utils import handleIndex, new_task
+from bot.helper.ext_utils.http_session import get_session
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.ext_utils.db_handler import DbManger
@@ -37,12 +38,11 @@ async def picture_add(_, message):
         return
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(msg_text) as resp:
-                if resp.status != 200:
-                    await editMessage(editable, "Failed to download image.")
-                    return
-                image_data = await resp.read()
+        async with get_session('transfer').get(msg_text) as resp:
+            if resp.status != 200:
+                await editMessage(editable, "Failed to download image.")
+                return
+            image_data = await resp.read()
     
     except Exception as e:
         LOGGER.error(f"Error downloading image: {e}")
@@ -4,12 +4,12 @@ import os
 import re
 import shlex
 from aiofiles import open as aiopen, remove as aioremove, path as aiopath
-from aiohttp import ClientSession
 from pyrogram.handlers import MessageHandler 
 from pyrogram.filters import command
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.message_utils import editMessage, sendMessage
+from bot.helper.ext_utils.http_session import get_session
 from bot.helper.ext_utils.bot_utils import cmd_exec
 from bot.helper.ext_utils.telegraph_helper import telegraph
 from bot import LOGGER, bot, config_dict
@@ -42,12 +42,11 @@ async def generate_mediainfo(message, link=None, media=None, mmsg=None):
             filename = re.search(".+/(.+)", link).group(1)
             des_path = os.path.join(MEDIAINFO_PATH, filename)
             headers = {"user-agent": "Mozilla/5.0 (Linux; Android 12; 2201116PI) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/107.0.0.0 Mobile Safari/537.36"}
-            async with ClientSession() as session:
-                async with session.get(link, headers=headers) as response:
-                    async with aiopen(des_path, "wb") as f:
-                        async for chunk in response.content.iter_chunked(10000000):
-                            await f.write(chunk)
-                            break
+            async with get_session('transfer').get(link, headers=headers) as response:
+                async with aiopen(des_path, "wb") as f:
+                    async for chunk in response.content.iter_chunked(10000000):
+                        await f.write(chunk)
+                        break
         elif media:
             des_path = os.path.join(MEDIAINFO_PATH, media.file_name)
             if media.file_size <= 50000000:
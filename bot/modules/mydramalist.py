@@ -24,6 +24,7 @@ from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.message_utils import send_message, edit_message
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.button_build import ButtonMaker
+from bot.helper.ext_utils.http_session import get_session
 
 LIST_ITEMS: Final = 4
 IMDB_GENRE_EMOJI: Final = {
@@ -64,17 +65,16 @@ async def mydramalist_search(client, message):
         user_id = message.from_user.id
         buttons = ButtonMaker()
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(
-                    f"{MDL_API}/search/q/{q(query)}"
-                ) as resp:
-                    data = await resp.json()
-                    if resp.status != 200 or not data or not data.get("results", {}).get("dramas"):
-                        return await edit_message(message, "<i>No Results Found</i>, Try Again or Use <b>MyDramaList Link</b>")
-            except Exception as e:
-                LOGGER.error(e)
-                return await edit_message(message, "<i>Error occurred while searching MyDramaList</i>")
+        try:
+            async with get_session().get(
+                f"{MDL_API}/search/q/{q(query)}"
+            ) as resp:
+                data = await resp.json()
+                if resp.status != 200 or not data or not data.get("results", {}).get("dramas"):
+                    return await edit_message(message, "<i>No Results Found</i>, Try Again or Use <b>MyDramaList Link</b>")
+        except Exception as e:
+            LOGGER.error(e)
+            return await edit_message(message, "<i>Error occurred while searching MyDramaList</i>")
 
         for drama in data["results"]["dramas"]:
             buttons.button(
@@ -93,14 +93,13 @@ async def mydramalist_search(client, message):
 
 
 async def extract_mdl(slug):
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(
-                f"{MDL_API}/id/{slug}"
-            ) as resp:
-                if resp.status != 200:
-                    return None
-                return await resp.json()
-        except Exception as e:
-            LOGGER.error(e)
-            return None
+    try:
+        async with get_session().get(
+            f"{MDL_API}/id/{slug}"
+        ) as resp:
+            if resp.status != 200:
+                return None
+            return await resp.json()
+    except Exception as e:
+        LOGGER.error(e)
+        return None
@@ -43,6 +43,7 @@ from bot.helper.ext_utils.bot_utils import (
 
 # Importing themes for displaying status
 from bot.helper.themes import BotTheme
+from bot.helper.telegram_helper.status_scheduler import status_scheduler
 
 def cpu_percent():
     return psutil.cpu_percent()
@@ -57,7 +58,19 @@ async def mirror_status(_, message):
     """
     This function sends the current status of the bot, including CPU, RAM, and disk usage, as well as the number of active downloads.
     If there are no active downloads, it sends a message indicating that there are no active downloads.
+    With the "int" argument it shows the current per-chat refresh intervals and edit budgets instead.
     """
+    if len(message.command) > 1 and message.command[1].lower().startswith('int'):
+        intervals = status_scheduler.intervals()
+        msg = f"<b>Status Refresh</b> (Base: {config_dict['STATUS_UPDATE_INTERVAL']}s)\n"
+        for chat_id, (interval, budget) in intervals.items():
+            msg += f"\n<code>{chat_id}</code>: every {interval}s, {budget} edits left this minute"
+        if not intervals:
+            msg += "\n<i>No active status messages.</i>"
+        reply_message = await sendMessage(message, msg)
+        await auto_delete_message(message, reply_message)
+        return
+
     async with download_dict_lock:
         count = len(download_dict)
 
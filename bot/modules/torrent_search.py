@@ -10,6 +10,7 @@ from pyrogram.context import AsyncContextManager
 from pyrogram.errors import SessionPasswordNeeded
 from bot.helper.telegram_helper.message_utils import editMessage, sendMessage
 from bot.helper.ext_utils.telegraph_helper import telegraph
+from bot.helper.ext_utils.http_session import get_session
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.ext_utils.bot_utils import get_readable_file_size, sync_to_async, new_task, checking_access
@@ -46,7 +47,6 @@ async def initiate_search_tools() -> None:
 
         if SEARCH_API_LINK := config_dict.get('SEARCH_API_LINK'):
             try:
-                async with AsyncContextManager(aiohttp.ClientSession(trust_env=True)) as c:
-                    async with c.get(f'{SEARCH_API_LINK}/api/v1/sites') as res:
-                        data = await res.json()
+                async with get_session('search').get(f'{SEARCH_API_LINK}/api/v1/sites') as res:
+                    data = await res.json()
               
@@ -8,6 +8,10 @@ import aiosessions
 from pyrogram import generate_filter, Client, filters, raw
 from pyrogram.errors import FloodWait
 from pyrogram.types import Message, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup
+from bot import download_dict
+from bot.helper.ext_utils.engine_snapshot import engine_snapshot
+from bot.helper.ext_utils.http_session import http_sessions
+from bot.helper.ext_utils.upload_clients import upload_clients
 
 # Create a new Pyrogram client instance with the name ":memory:" and 1 worker.
 app = Client(":memory:", workers=1)
@@ -59,6 +63,8 @@ async def restart_command(client: Client, message: Message) -> None:
     It restarts the bot.
     """
     await message.reply("Restarting...")
+    await http_sessions.close_all()
+    await upload_clients.stop_helpers()
     os.execv(sys.executable, [sys.executable] + sys.argv)
 
 # Add type hints and docstrings to the shutdown_command function.
@@ -69,6 +75,8 @@ async def shutdown_command(client: Client, message: Message) -> None:
     It shuts down the bot.
     """
     await message.reply("Shutting down...")
+    await http_sessions.close_all()
+    await upload_clients.stop_helpers()
     os._exit(0)
 
 # Add type hints and docstrings to the stats_command function.
@@ -121,10 +129,8 @@ async def select(client: Client, message: Message) -> None:
         gid = cmd_data[1].split('@', maxsplit=1)[0].strip()
     elif message.reply_to_message:
         reply_message = message.reply_to_message
-        async with download_dict_lock:
-            download_info = download_dict.get(reply_message.message_id, None)
-            if download_info:
-                gid = download_info.get('gid')
+        if download_info := download_dict.by_uid(reply_message.id):
+            gid = download_info.gid()
     else:
         await client.send_message(message.chat.id, "Invalid usage. Reply to a task or use /btselect <gid>")
         return
@@ -134,7 +140,7 @@ async def select(client: Client, message: Message) -> None:
         return
 
     try:
-        dl = await get_download_by_gid(gid)
+        dl = download_dict.by_gid(gid)
     except Exception as e:
         await client.send_message(message.chat.id, f"Error: {e}")
         return
@@ -187,7 +193,7 @@ async def get_confirm(client: Client, query: CallbackQuery) -> None:
     user_id = query.from_user.id
     data = query.data.split()
     message = query.message
-    dl = await get_download_by_gid(data[2])
+    dl = download_dict.by_gid(data[2])
 
     if not dl:
         await query.answer("This task has been cancelled!", show_alert=True)
@@ -207,11 +213,16 @@ async def get_confirm(client: Client, query: CallbackQuery) -> None:
     if data[1] == "pin":
         await query.answer(data[3], show_alert=True)
     elif data[1] == "done":
-        await query.answer()
         id_ = data[3]
+        if len(id_) > 20 and (tor_info := engine_snapshot.qbit_torrent(hash=id_)) is None:
+            # Not in the last snapshot yet, pull the pending delta off the loop
+            await engine_snapshot.refresh(True)
+            if (tor_info := engine_snapshot.qbit_torrent(hash=id_)) is None:
+                await query.answer("Torrent not found, try again in a moment!", show_alert=True)
+                return
+        await query.answer()
         if len(id_) > 20:
             client_ = dl.client
-            tor_info = (await sync_to_async(client_.torrents_info, torrent_hash=[id_]))[0]
             path = tor_info.content_path.rsplit('/', 1)[0]
             async with aiofiles.open(f"{path}/.selected_files", "w") as f:
                 f.write("")
@@ -21,6 +21,7 @@ from bot.helper.telegram_helper.bot_commands import BotCommands
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.mirror_utils.upload_utils.gdriveTools import GoogleDriveHelper
 from bot.helper.ext_utils.db_handler import DbManger
+from bot.helper.ext_utils.zip_profiles import available_profiles, get_zip_profile
 from bot.helper.ext_utils.bot_utils import getdailytasks, update_user_ldata, get_readable_file_size, sync_to_async, new_thread, is_gdrive_link
 from bot.helper.mirror_utils.upload_utils.ddlserver.gofile import Gofile
 from bot.helper.themes import BotTheme
@@ -38,6 +39,7 @@ desp_dict = {'rcc': ['RClone is a command-line program to sync files and directo
             'thumb': ['Custom Thumbnail to appear on the Leeched files uploaded by the bot', 'Send a photo to save it as custom thumbnail. \n<b>Alternatively: </b><code>/cmd [photo] -s thumb</code> \n<b>Timeout:</b> 60 sec'],
             'yt_opt': ['YT-DLP Options is the Custom Quality for the extraction of videos from the yt-dlp supported sites.', 'Send YT-DLP Options. Timeout: 60 sec\nFormat: key:value|key:value|key:value.\nExample: format:bv*+mergeall[vcodec=none]|nocheckcertificate:True\nCheck all yt-dlp api options from this <a href="https://github.com/yt-dlp/yt-dlp/blob/master/yt_dlp/YoutubeDL.py#L184">FILE</a> to convert cli arguments to api options.'],
             'usess': [f'User Session is Telegram Session used to Download Private Contents from Private Channels with no compromise in Privacy, Build with Encryption.\n{"<b>Warning:</b> This Bot is not secured. We recommend asking the group owner to set the Upstream repo to the Official repo. If it is not the official repo, then WZML-X is not responsible for any issues that may occur in your account." if config_dict["UPSTREAM_REPO"] != "https://github.com/weebzone/WZML-X" else "Bot is Secure. You can use the session securely."}', 'Send your Session String.\n<b>Timeout:</b> 60 sec'],
+            'excluded_exts': ['Excluded Extensions are skipped while extracting archives, on top of the global Extension Filter.', 'Send file extensions separated by space. \n<b>Example:</b> <code>nfo txt jpg</code> \n<b>Timeout:</b> 60 sec'],
             'split_size': ['Leech Splits Size is the size to split the Leeched File before uploading', f'Send Leech split size in any comfortable size, like 2Gb, 500MB or 1.46gB. \n<b>PREMIUM ACTIVE:</b> {IS_PREMIUM_USER}. \n<b>Timeout:</b> 60 sec'],
             'ddl_servers': ['DDL Servers which uploads your File to their Specific Hosting', ''],
             'user_tds': [f'UserTD helps to Upload files via Bot to your Custom Drive Destination via Global SA mail\n\n➲ <b>SA Mail :</b> {"Not Specified" if "USER_TD_SA" not in config_dict else config_dict["USER_TD_SA"]}', 'Send User TD details for Use while Mirror/Clone\n➲ <b>Format:</b>\nname id/link index(optional)\nname2 link2/id2 index(optional)\n\n<b>NOTE:</b>\n<i>1. Drive ID must be valid, then only it will accept\n2. Names can have spaces\n3. All UserTDs are updated on every change\n4. To delete specific UserTD, give Name(s) separated by each line</i>\n\n<b>Timeout:</b> 60 sec'],
@@ -56,6 +58,7 @@ fname_dict = {'rcc': 'RClone',
              'thumb': 'Thumbnail',
              'yt_opt': 'YT-DLP Options',
              'usess': 'User Session',
+             'excluded_exts': 'Excluded Exts',
              'split_size': 'Leech Splits',
              'ddl_servers': 'DDL Servers',
              'user_tds': 'User Custom TDs',
@@ -86,6 +89,8 @@ async def get_user_settings(from_user, key=None, edit_type=None, edit_mode=None)
         buttons.ibutton(f"{'✅️' if ytopt != 'Not Exists' else ''} YT-DLP Options", f"userset {user_id} yt_opt")
         u_sess = 'Exists' if user_dict.get('usess', False) else 'Not Exists'
         buttons.ibutton(f"{'✅️' if u_sess != 'Not Exists' else ''} User Session", f"userset {user_id} usess")
+        excluded_exts = user_dict.get('excluded_exts', [])
+        buttons.ibutton(f"{'✅️' if excluded_exts else ''} Excluded Exts", f"userset {user_id} excluded_exts")
         bot_pm = "Enabled" if user_dict.get('bot_pm', config_dict['BOT_PM']) else "Disabled"
         buttons.ibutton('Disable Bot PM' if bot_pm == 'Enabled' else 'Enable Bot PM', f"userset {user_id} bot_pm")
         if config_dict['BOT_PM']:
@@ -96,6 +101,8 @@ async def get_user_settings(from_user, key=None, edit_type=None, edit_mode=None)
             mediainfo = "Force Enabled"
         save_mode = "Save As Dump" if user_dict.get('save_mode') else "Save As BotPM"
         buttons.ibutton('Save As BotPM' if save_mode == 'Save As Dump' else 'Save As Dump', f"userset {user_id} save_mode")
+        zip_profile = get_zip_profile(user_dict)
+        buttons.ibutton(f"Zip Profile: {zip_profile}", f"userset {user_id} zprofile")
         dailytl = config_dict['DAILY_TASK_LIMIT'] or "∞"
         dailytas = user_dict.get('dly_tasks')[1] if user_dict and user_dict.get('dly_tasks') and user_id != OWNER_ID and config_dict['DAILY_TASK_LIMIT'] else config_dict['DAILY_TASK_LIMIT'] or "️∞" if user_id != OWNER_ID else "∞"
         if user_dict.get('dly_tasks', False):
@@ -206,6 +213,9 @@ async def get_user_settings(from_user, key=None, edit_type=None, edit_mode=None)
         elif key == 'yt_opt':
             set_exist = 'Not Exists' if (val:=user_dict.get('yt_opt', config_dict.get('YT_DLP_OPTIONS', ''))) == '' else val
             text += f"➲ <b>YT-DLP Options :</b> <code>{escape(set_exist)}</code>\n\n"
+        elif key == 'excluded_exts':
+            set_exist = 'Not Exists' if not (val:=user_dict.get('excluded_exts', [])) else ' '.join(val)
+            text += f"➲ <b>Excluded Extensions :</b> <code>{escape(set_exist)}</code>\n\n"
         elif key == 'usess':
             set_exist = 'Exists' if user_dict.get('usess') else 'Not Exists'
             text += f"➲ <b>{fname_dict[key]} :</b> <code>{set_exist}</code>\n➲ <b>Encryption :</b> {'🔐' if set_exist else '🔓'}\n\n"
@@ -351,8 +361,10 @@ async def set_custom(client, message, pre_event, key, direct=False):
             if len(dump_info) > 1 and (dump_chat := await chat_info(dump_info[1])):
                 ldumps[dump_info[0]] = dump_chat.id
         value = ldumps
-    elif key in ['yt_opt', 'usess']:
-        if key == 'usess':
+    elif key in ['yt_opt', 'usess', 'excluded_exts']:
+        if key == 'excluded_exts':
+            value = [ext.strip().lstrip('.').lower() for ext in value.split() if ext.strip('. ')]
+        elif key == 'usess':
             password = Fernet.generate_key()
             try:
                 await deleteMessage(await (await sendCustomMsg(message.from_user.id, f"<u><b>Decryption Key:</b></u> \n┃\n┃ <code>{password.decode()}</code>\n┃\n┖ <b>Note:</b> <i>Keep this Key Securely, this is not Stored in Bot and Access Key to use your Session...</i>")).pin(both_sides=True))
@@ -502,7 +514,7 @@ async def edit_user_settings(client, query):
         pfunc = partial(set_thumb, pre_event=query, key=data[2])
         rfunc = partial(update_user_settings, query, data[2], 'leech')
         await event_handler(client, query, pfunc, rfunc, True)
-    elif data[2] in ['yt_opt', 'usess']:
+    elif data[2] in ['yt_opt', 'usess', 'excluded_exts']:
         await query.answer()
         edit_mode = len(data) == 4
         await update_user_settings(query, data[2], 'universal', edit_mode)
@@ -510,7 +522,7 @@ async def edit_user_settings(client, query):
         pfunc = partial(set_custom, pre_event=query, key=data[2])
         rfunc = partial(update_user_settings, query, data[2], 'universal')
         await event_handler(client, query, pfunc, rfunc)
-    elif data[2] in ['dyt_opt', 'dusess']:
+    elif data[2] in ['dyt_opt', 'dusess', 'dexcluded_exts']:
         handler_dict[user_id] = False
         await query.answer()
         update_user_ldata(user_id, data[2][1:], '')
@@ -534,6 +546,16 @@ async def edit_user_settings(client, query):
             await update_user_settings(query, 'universal')
         if DATABASE_URL:
             await DbManger().update_user_data(user_id)
+    elif data[2] == 'zprofile':
+        handler_dict[user_id] = False
+        profiles = available_profiles()
+        current = get_zip_profile(user_dict)
+        next_profile = profiles[(profiles.index(current) + 1) % len(profiles)]
+        await query.answer(f"Zip Profile: {next_profile}")
+        update_user_ldata(user_id, 'zip_profile', next_profile)
+        await update_user_settings(query, 'universal')
+        if DATABASE_URL:
+            await DbManger().update_user_data(user_id)
     elif data[2] == 'split_size':
         await query.answer()
         edit_mode = len(data) == 4